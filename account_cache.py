@@ -0,0 +1,76 @@
+import time
+from threading import Lock
+from config import CONFIG
+
+class AccountCache:
+    # TTL cache for trading fees and free balances per exchange. Real fills are applied to the
+    # cached balances as local deltas so the order path rarely needs a fetch_balance round-trip.
+    def __init__(self):
+        self.lock = Lock()
+        self.fees = {}
+        self.balances = {}
+
+    async def get_fees(self, exchange_name, fetch):
+        with self.lock:
+            cached = self.fees.get(exchange_name)
+        if cached and time.time() - cached[1] < CONFIG['FEE_CACHE_TTL']:
+            return cached[0]
+        try:
+            fees = await fetch()
+        except Exception:
+            # Cache an empty result for the TTL too: without keys, or on an exchange without
+            # fetch_trading_fees, the request then fails once per TTL instead of once per trade
+            with self.lock:
+                self.fees[exchange_name] = ({}, time.time())
+            raise
+        with self.lock:
+            self.fees[exchange_name] = (fees, time.time())
+        return fees
+
+    async def get_free_balance(self, exchange_name, currency, fetch):
+        with self.lock:
+            cached = self.balances.get(exchange_name)
+        if not cached or time.time() - cached[1] >= CONFIG['BALANCE_CACHE_TTL']:
+            self.store_balance(exchange_name, await fetch())
+            with self.lock:
+                cached = self.balances[exchange_name]
+        return cached[0].get(currency, 0.0)
+
+    def cached_free_balance(self, exchange_name, currency):
+        # Last known free balance without fetching, or None if none is cached
+        with self.lock:
+            cached = self.balances.get(exchange_name)
+        return cached[0].get(currency, 0.0) if cached else None
+
+    def store_balance(self, exchange_name, balance):
+        free = {currency: values.get('free') or 0.0 for currency, values in balance.items() if isinstance(values, dict) and 'free' in values}
+        with self.lock:
+            self.balances[exchange_name] = (free, time.time())
+
+    def apply_fill(self, exchange_name, symbol, signal, amount, price, fees):
+        with self.lock:
+            cached = self.balances.get(exchange_name)
+            if not cached:
+                return
+            base, quote = symbol.replace('-', '/').split('/')
+            free = cached[0]
+            if signal == "BUY":
+                free[base] = free.get(base, 0.0) + amount
+                free[quote] = free.get(quote, 0.0) - price * amount - fees
+            else:
+                free[base] = free.get(base, 0.0) - amount
+                free[quote] = free.get(quote, 0.0) + price * amount - fees
+
+    def invalidate_balance(self, exchange_name=None):
+        with self.lock:
+            if exchange_name:
+                self.balances.pop(exchange_name, None)
+            else:
+                self.balances.clear()
+
+    def invalidate_fees(self, exchange_name=None):
+        with self.lock:
+            if exchange_name:
+                self.fees.pop(exchange_name, None)
+            else:
+                self.fees.clear()
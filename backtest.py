@@ -0,0 +1,229 @@
+import os
+import random
+import asyncio
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config import CONFIG, CRYPTO_PAIRS, PROFIT_TRACKER, STRATEGY_MASK
+from position_book import POSITION
+from data_manager import OHLCV_HISTORY, TRADE_MARKERS, CandleStore, candle_file
+from trading_strategies import TradingStrategies
+from profit_stats import PROFIT_STATS
+from journal import JOURNAL
+
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+def load_candles(data_dir, pair, exchange_name, timeframe=CONFIG['TIMEFRAME']):
+    # Candles as an (n, 6) float64 array sorted by timestamp, from Parquet, CSV or the bot's own candle store
+    for ext, reader in (('parquet', pd.read_parquet), ('csv', pd.read_csv)):
+        path = candle_file(data_dir, pair, exchange_name, ext)
+        if os.path.exists(path):
+            df = reader(path)
+            return df[COLUMNS].sort_values('timestamp').drop_duplicates('timestamp', keep='last').to_numpy(dtype=np.float64)
+    return CandleStore(data_dir, timeframe).load(pair, exchange_name)
+
+def rolling_mean(values, period):
+    result = np.full(len(values), np.nan)
+    if period <= 0 or len(values) < period:
+        return result
+    sums = np.cumsum(np.insert(values, 0, 0.0))
+    result[period - 1:] = (sums[period:] - sums[:-period]) / period
+    return result
+
+def align_closes(times, other):
+    # Last close of the other exchange at or before each timestamp (0.0 before its first candle)
+    if other is None or not len(other):
+        return np.zeros(len(times))
+    idx = np.searchsorted(other[:, 0], times, side='right') - 1
+    return np.where(idx >= 0, other[np.maximum(idx, 0), 4], 0.0)
+
+def next_below(values, start, level, chunk=4096):
+    # Index of the first value below level at or after start, scanning in vectorized chunks
+    for offset in range(start, len(values), chunk):
+        hits = np.flatnonzero(values[offset:offset + chunk] < level)
+        if len(hits):
+            return offset + hits[0]
+    return None
+
+def summarize(trades):
+    profits = np.array([trade['net_profit'] for trade in trades], dtype=np.float64)
+    if not len(profits):
+        return {'pnl': 0.0, 'trade_count': 0, 'win_rate': 0.0, 'max_drawdown': 0.0}
+    equity = np.cumsum(profits)
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0.0)) - equity
+    return {
+        'pnl': float(equity[-1]),
+        'trade_count': len(profits),
+        'win_rate': float(np.mean(profits > 0)),
+        'max_drawdown': float(drawdown.max()),
+    }
+
+class SimulatedClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += seconds
+
+class SimulatedExchange:
+    def __init__(self, name):
+        self.name = name
+
+    def fetch_trading_fees(self):
+        fee = CONFIG[f"FEE_RATE_{self.name.upper()}"]
+        return {symbols[self.name].replace('-', '/'): {'maker': fee, 'taker': fee} for symbols in CRYPTO_PAIRS.values() if self.name in symbols}
+
+def parse_overrides(specs):
+    # KEY=value -> CONFIG overrides, each value converted to the type of the key's current setting
+    overrides = {}
+    for spec in specs:
+        key, _, text = spec.partition('=')
+        if key not in CONFIG:
+            raise ValueError(f"Unknown config key: {key}")
+        current = CONFIG[key]
+        if isinstance(current, bool):
+            overrides[key] = text.lower() in ('1', 'true', 'yes', 'on')
+        elif isinstance(current, (int, float)):
+            overrides[key] = int(text) if isinstance(current, int) and text.lstrip('-').isdigit() else float(text)
+        else:
+            overrides[key] = text
+    return overrides
+
+class Backtester:
+    # Runs on the process-wide CONFIG, POSITION, PROFIT_TRACKER and PROFIT_STATS (restoring CONFIG
+    # afterwards), so it belongs in its own process: the CLI, the sweep workers or a notebook, never
+    # the live bot. run() refuses to start while the journal is active, which marks a live process.
+    def __init__(self, pair, binance_candles, coinbase_candles=None, overrides=None, seed=0, log_func=None):
+        self.pair = pair
+        self.binance_candles = binance_candles
+        self.coinbase_candles = coinbase_candles
+        self.overrides = overrides or {}
+        self.seed = seed
+        self.log = log_func or (lambda message: None)
+
+    def reset_state(self):
+        POSITION.reset(self.pair)
+        PROFIT_TRACKER.update({'total_profit': 0.0, 'trades': [], 'trade_count': 0, 'last_trade_time': None})
+        PROFIT_STATS.reset()
+        TRADE_MARKERS[self.pair].clear()
+
+    def run(self):
+        if JOURNAL.thread:
+            raise RuntimeError("Backtester would overwrite the live positions and profit; run it in a separate process")
+        saved = dict(CONFIG)
+        CONFIG.update(self.overrides)
+        CONFIG['DRY_RUN'] = True
+        random.seed(self.seed)
+        try:
+            self.reset_state()
+            return asyncio.run(self.run_async())
+        finally:
+            CONFIG.clear()
+            CONFIG.update(saved)
+
+    async def run_async(self):
+        candles = self.binance_candles
+        times = candles[:, 0] / 1000.0
+        closes = candles[:, 4]
+        coinbase_closes = align_closes(candles[:, 0], self.coinbase_candles)
+
+        # Vectorized precomputation: the strategies can only act on candles where these hold
+        sma_fast = rolling_mean(closes, CONFIG['SMA_FAST'])
+        sma_slow = rolling_mean(closes, CONFIG['SMA_SLOW'])
+        buy_idx = np.flatnonzero(sma_fast > sma_slow * (1 + CONFIG['SCALPING_THRESHOLD']))
+        sell_idx = np.flatnonzero(sma_fast < sma_slow * (1 - CONFIG['SCALPING_THRESHOLD']))
+        mask = STRATEGY_MASK.get(self.pair, {})
+        arbitrage = mask.get('arbitrage') and self.coinbase_candles is not None and 'coinbase' in CRYPTO_PAIRS[self.pair]
+        if arbitrage:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                price_diff = np.where(coinbase_closes > 0, (closes - coinbase_closes) / coinbase_closes, 0.0)
+            arb_idx = np.flatnonzero((coinbase_closes > 0) & (np.abs(price_diff) > CONFIG['CROSS_ARBITRAGE_THRESHOLD']))
+        else:
+            arb_idx = np.empty(0, dtype=np.int64)
+        if not mask.get('scalping'):
+            buy_idx = sell_idx = np.empty(0, dtype=np.int64)
+
+        clock = SimulatedClock(times[0] if len(times) else 0.0)
+        strategies = TradingStrategies(SimulatedExchange('binance'), SimulatedExchange('coinbase') if arbitrage else None, self.log)
+        strategies.clock = clock.time
+        strategies.sleep = clock.sleep
+        strategies.record_memory = False
+        history = OHLCV_HISTORY[self.pair]['binance']
+        history.resize(max(CONFIG['LIMIT'], CONFIG['SMA_FAST'], CONFIG['SMA_SLOW']))
+
+        window = max(CONFIG['SMA_FAST'], CONFIG['SMA_SLOW'], CONFIG['ATR_PERIOD'])
+        i = max(CONFIG['SMA_FAST'], CONFIG['SMA_SLOW']) - 1
+        loaded = -2
+        evaluated = 0
+        while i < len(candles) and not strategies.trading_paused:
+            position = POSITION[self.pair]['binance'].state
+            scalping_idx = sell_idx if position.holding else buy_idx
+            next_candles = [idx[k] for idx in (scalping_idx, arb_idx) if (k := np.searchsorted(idx, i)) < len(idx)]
+            if position.holding and len(buy_idx):
+                stop = next_below(closes, i, position.entry_price * (1 - CONFIG['STOP_LOSS_PERCENTAGE']))
+                if stop is not None:
+                    next_candles.append(stop)
+            if not next_candles:
+                break
+            j = min(next_candles)
+            clock.now = max(clock.now, times[j])
+            if j == loaded + 1:
+                history.append(candles[j])
+            else:
+                history.load(candles[max(0, j - window + 1):j + 1])
+            loaded = j
+            first_new = len(PROFIT_TRACKER['trades'])
+            await strategies.run_pair_strategies({self.pair: {'binance': float(closes[j]), 'coinbase': float(coinbase_closes[j])}}, self.pair)
+            for trade in PROFIT_TRACKER['trades'][first_new:]:
+                trade['time'] = datetime.fromtimestamp(clock.now).isoformat()
+            evaluated += 1
+            i = j + 1
+
+        trades = list(PROFIT_TRACKER['trades'])
+        result = summarize(trades)
+        result.update({'pair': self.pair, 'candles': len(candles), 'evaluated': evaluated,
+                       'rejected_by_cost': strategies.cost_rejections, 'trades': trades})
+        return result
+
+def run_backtest(data_dir, pairs, overrides=None, seed=0, log_func=None):
+    results = []
+    for pair in pairs:
+        binance_candles = load_candles(data_dir, pair, 'binance')
+        if binance_candles is None:
+            print(f"No candles for {pair} in {data_dir}")
+            continue
+        coinbase_candles = load_candles(data_dir, pair, 'coinbase')
+        results.append(Backtester(pair, binance_candles, coinbase_candles, overrides, seed, log_func).run())
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay stored candles through the trading strategies")
+    parser.add_argument("--data-dir", default=CONFIG['CANDLE_DATA_DIR'])
+    parser.add_argument("--pairs", nargs="+", default=list(POSITION.keys()))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trades", help="write all simulated trades to this CSV file")
+    parser.add_argument("--verbose", action="store_true", help="print strategy log lines")
+    parser.add_argument("--set", nargs="+", default=[], metavar="KEY=value", help="override CONFIG settings for the run")
+    args = parser.parse_args()
+    try:
+        overrides = parse_overrides(args.set)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = run_backtest(args.data_dir, args.pairs, overrides, seed=args.seed, log_func=print if args.verbose else None)
+    for result in results:
+        print(f"{result['pair']}: candles={result['candles']} evaluated={result['evaluated']} trades={result['trade_count']} "
+              f"rejected_by_cost={result['rejected_by_cost']} pnl={result['pnl']:.4f} win_rate={result['win_rate']:.2%} "
+              f"max_drawdown={result['max_drawdown']:.4f}")
+        if not result['trade_count'] and result['rejected_by_cost']:
+            print(f"  every entry was refused by the dry-run cost gate: MIN_PROFIT_MARGIN ({overrides.get('MIN_PROFIT_MARGIN', CONFIG['MIN_PROFIT_MARGIN'])}) "
+                  f"must exceed 1.5 x (fee + SLIPPAGE); try --set MIN_PROFIT_MARGIN=...")
+    if args.trades:
+        pd.DataFrame([dict(trade, pair=result['pair']) for result in results for trade in result['trades']]).to_csv(args.trades, index=False)
+
+if __name__ == "__main__":
+    main()
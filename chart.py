@@ -0,0 +1,107 @@
+import time
+from datetime import datetime
+import numpy as np
+import matplotlib.dates as mdates
+from config import CONFIG
+
+EPOCH = mdates.date2num(datetime(1970, 1, 1))
+
+def local_datenums(timestamps):
+    # Epoch seconds -> matplotlib date numbers in local time (the chart is labelled local)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    if not len(timestamps):
+        return timestamps
+    offset = datetime.fromtimestamp(timestamps[-1]).astimezone().utcoffset().total_seconds()
+    return (timestamps + offset) / 86400.0 + EPOCH
+
+def positive(values):
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(values > 0, values, np.nan)
+
+class ChartRenderer:
+    # Price chart with persistent, animated artists. Frames only update artist data and blit
+    # them over a cached background (axes, grid, legend, title); the full figure is redrawn
+    # only when the axis limits or the pair change, and never more often than CHART_FPS.
+    def __init__(self, fig, ax, canvas, text_color, legend_bg):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.text_color = text_color
+        self.pair = None
+        self.background = None
+        self.last_render = 0.0
+        self.binance = ax.plot([], [], '#00FFFF', label='Binance', linewidth=1.5, animated=True)[0]
+        self.sma_fast = ax.plot([], [], '#FF00FF', label='SMA Fast', linestyle='--', animated=True)[0]
+        self.sma_slow = ax.plot([], [], '#00FF00', label='SMA Slow', linestyle='--', animated=True)[0]
+        self.coinbase = ax.plot([], [], '#FFFF00', label='Coinbase', linewidth=1.5, animated=True)[0]
+        self.buys = ax.plot([], [], linestyle='', color='green', marker='^', markersize=10, label='Buy', animated=True)[0]
+        self.sells = ax.plot([], [], linestyle='', color='red', marker='v', markersize=10, label='Sell', animated=True)[0]
+        self.artists = (self.binance, self.sma_fast, self.sma_slow, self.coinbase, self.buys, self.sells)
+        ax.legend(facecolor=legend_bg, edgecolor=text_color, labelcolor=text_color, loc='upper left')
+        ax.set_xlabel("Time (Local)", color=text_color)
+        ax.set_ylabel("Price (USD)", color=text_color)
+        ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+        fig.autofmt_xdate()
+        canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        # Any full draw (ours, a resize, a re-expose) refreshes the cached background
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_artists()
+
+    def draw_artists(self):
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+
+    def render(self, pair, series, markers, time_window, force=False):
+        now = time.time()
+        if not force and now - self.last_render < 1.0 / CONFIG['CHART_FPS']:
+            return False
+        self.last_render = now
+
+        x = local_datenums(series.times)
+        binance = positive(series.binance)
+        coinbase = positive(series.coinbase)
+        show_sma = len(series) >= CONFIG['SMA_SLOW']
+        self.binance.set_data(x, binance)
+        self.coinbase.set_data(x, coinbase)
+        self.sma_fast.set_data(x, series.sma_fast)
+        self.sma_slow.set_data(x, series.sma_slow)
+        self.sma_fast.set_visible(show_sma)
+        self.sma_slow.set_visible(show_sma)
+        for artist, signal in ((self.buys, "BUY"), (self.sells, "SELL")):
+            points = [(t, p) for t, p, s in markers if s == signal]
+            artist.set_data(local_datenums([t for t, _ in points]), [p for _, p in points])
+
+        prices = np.concatenate((binance, coinbase, [p for _, p, _ in markers]))
+        limits_changed = self.limits_changed(now, time_window, prices)
+        if limits_changed or pair != self.pair or self.background is None:
+            self.pair = pair
+            self.ax.set_title(f"{pair} Price Movement (Local Time)", color=self.text_color)
+            self.canvas.draw()  # triggers on_draw, which caches the background and draws the artists
+        else:
+            self.canvas.restore_region(self.background)
+            self.draw_artists()
+            self.canvas.blit(self.ax.bbox)  # Tk shows it on its next idle redraw
+        return True
+
+    def limits_changed(self, now, time_window, prices):
+        # Move the axes (forcing a full redraw) only when the data leaves them or the window changes;
+        # the right edge has 10% headroom so a redraw is needed once per tenth of the window.
+        changed = False
+        left, right = self.ax.get_xlim()
+        now_x = local_datenums([now])[0]
+        span = time_window / 86400.0
+        if now_x > right or abs((right - left) - span * 1.1) > 1e-9:
+            self.ax.set_xlim(now_x - span, now_x + span * 0.1)
+            changed = True
+        prices = prices[np.isfinite(prices)]
+        if len(prices):
+            low, high = prices.min(), prices.max()
+            bottom, top = self.ax.get_ylim()
+            pad = max((high - low) * 0.1, high * 1e-4)
+            if low < bottom or high > top or (top - bottom) > 4 * (high - low + 2 * pad):
+                self.ax.set_ylim(low - pad, high + pad)
+                changed = True
+        return changed
@@ -1,5 +1,3 @@
-import pandas as pd
-
 CRYPTO_PAIRS = {
     'BTC/USDT': {'binance': 'BTC/USDT', 'coinbase': 'BTC-USDC'},
     'ETH/USDT': {'binance': 'ETH/USDT', 'coinbase': 'ETH-USDC'},
@@ -12,9 +10,11 @@ CRYPTO_PAIRS = {
 CONFIG = {
     'TIMEFRAME': '1m',
     'LIMIT': 200,
+    'INCREMENTAL_LIMIT': 5,
     'MIN_USDT_BALANCE': 10.0,
     'DRY_RUN': True,
     'LOOP_INTERVAL': 0.1,
+    'EVENT_IDLE_TIMEOUT': 1.0,  # max seconds between strategy/snapshot passes when no market data changes
     'BALANCE_PERCENTAGE': 0.95,
     'MIN_TRADE_AMOUNT': 0.00005,
     'TRADE_SIZE_PERCENTAGE': 0.1,
@@ -25,6 +25,8 @@ CONFIG = {
     'SMA_FAST': 10,
     'SMA_SLOW': 50,
     'TRIANGULAR_THRESHOLD': 0.001,
+    'TRIANGULAR_ARBITRAGE': False,  # scan every 3-cycle of Binance spot markets each tick
+    'TRIANGULAR_START_CURRENCIES': ['USDT'],
     'VOLATILITY_WINDOW': 20,
     'FUNDING_RATE_THRESHOLD': 0.0005,
     'SIMULATED_BALANCE': 25,
@@ -39,13 +41,54 @@ CONFIG = {
     'MIN_PROFIT_MARGIN': 0.002,
     'CIRCUIT_BREAKER_THRESHOLD': 0.05,
     'ATR_PERIOD': 14,
+    'ORDER_BOOK_DEPTH': 20,
+    'ORDER_BOOK_TTL': 5,  # seconds before a book snapshot is too old to size arbitrage from
+    'MAX_CONCURRENT_REQUESTS': 8,
+    'FETCH_TIMEOUT': 5.0,
+    'FETCH_RETRIES': 3,
+    'FETCH_BACKOFF': 0.25,
+    'RATE_LIMITS': {'binance': (6000, 60), 'coinbase': (10, 1)},  # request weight budget per (capacity, seconds)
+    'RATE_LIMIT_POLL': 0.01,
+    'BATCH_TICKERS': True,  # REST mode: one fetch_tickers per exchange per poll; OHLCV only on candle rollover
+    'TRADE_ALL_PAIRS': True,
+    'FEE_CACHE_TTL': 3600,
+    'BALANCE_CACHE_TTL': 30,
+    'TRADE_MEMORY_DB': 'trade_memory.db',
+    'TRADE_MEMORY_FLUSH_INTERVAL': 5.0,
+    'TRADE_MEMORY_FLUSH_SIZE': 100,
+    'CANDLE_DATA_DIR': 'candles',
+    'CANDLE_STORE': True,  # persist closed candles to CANDLE_DATA_DIR and warm-start from them
+    'TRADE_STORE_DIR': 'trade_store',
+    'TRADE_STORE': True,  # also append each profit report's trades to the columnar store in TRADE_STORE_DIR
+    'JOURNAL': True,  # journal positions and PnL to JOURNAL_DIR and recover them on startup
+    'JOURNAL_DIR': 'journal',
+    'JOURNAL_SNAPSHOT_INTERVAL': 60,  # seconds between snapshots while records are arriving
+    'JOURNAL_SNAPSHOT_RECORDS': 10000,
+    'JOURNAL_RECONCILE_TOLERANCE': 0.01,  # fraction of a recovered position that may be missing from the exchange balance
+    'MARKET_CACHE_DIR': 'cache',
+    'MARKET_CACHE_TTL': 86400,  # seconds a cached load_markets result is reused; 0 disables the cache
+    'GUI_FPS': 4,
+    'CHART_FPS': 2,  # chart redraw cap, independent of GUI_FPS and the trading loop
+    'LOG_FILE': 'logs/bobby_bot.log',
+    'LOG_MAX_BYTES': 10 * 1024 * 1024,
+    'LOG_BACKUP_COUNT': 5,
+    'LOG_SCROLLBACK': 2000,  # lines kept in the GUI log widget
+    'LOG_FLUSH_INTERVAL': 0.2,
+    'SNAPSHOT_SERVER': None,  # host:port for the headless engine to publish state snapshots on
+    'SNAPSHOT_BUFFER_LIMIT': 1 << 20,
+    'METRICS_SERVER': None,  # host:port for the headless engine's Prometheus-style metrics endpoint
+    'METRICS_DUMP_FILE': None,  # periodic JSON dump of latency histograms (works with the GUI too)
+    'METRICS_DUMP_INTERVAL': 60,
+    'MARKET_DATA_MODE': 'rest',  # 'rest' polls OHLCV, 'stream' uses websocket tickers/candles
+    'STREAM_REPLAY_FILE': None,
+    'STREAM_REPLAY_SPEED': 1.0,
+    'STREAM_SERVER': None,  # host:port of a local replay server (python market_stream.py <file>)
 }
 
 # Global state
-POSITION = {pair: {
-    'binance': {'holding': False, 'amount': 0.0, 'entry_price': 0.0, 'exchange': 'binance'},
-    'coinbase': {'holding': False, 'amount': 0.0, 'entry_price': 0.0, 'exchange': 'coinbase'}
-} for pair in CRYPTO_PAIRS if 'USDT' in pair}
+
+# Per-pair strategy enable mask; arbitrage needs the pair listed on both exchanges
+STRATEGY_MASK = {pair: {'arbitrage': len(CRYPTO_PAIRS[pair]) > 1, 'scalping': True} for pair in CRYPTO_PAIRS if 'USDT' in pair}
 
 PROFIT_TRACKER = {'total_profit': 0.0, 'trades': [], 'trade_count': 0, 'last_trade_time': None}
 
@@ -53,10 +96,3 @@ EXCHANGE_QUOTE_CURRENCIES = {
     'binance': 'USDT',
     'coinbase': 'USDC'
 }
-
-try:
-    TRADE_MEMORY = pd.read_csv("trade_memory.csv")
-    if not all(col in TRADE_MEMORY.columns for col in ["timestamp", "pair", "exchange", "entry_price", "exit_price", "profit", "sma_fast", "sma_slow"]):
-        raise ValueError("Invalid columns in trade_memory.csv")
-except (FileNotFoundError, ValueError):
-    TRADE_MEMORY = pd.DataFrame(columns=["timestamp", "pair", "exchange", "entry_price", "exit_price", "profit", "sma_fast", "sma_slow"])
\ No newline at end of file
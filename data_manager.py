@@ -1,17 +1,381 @@
-import ccxt
-import pandas as pd
+import os
+import asyncio
+import time
 import numpy as np
 from tenacity import retry, wait_exponential, stop_after_attempt
-from config import CONFIG, CRYPTO_PAIRS, TRADE_MEMORY
+from config import CONFIG, CRYPTO_PAIRS
 from collections import deque
+from exchanges import initialize_exchange
+from rate_limiter import RATE_LIMITER
+from metrics import METRICS
 
-PRICE_HISTORY = {pair: deque(maxlen=1000) for pair in CRYPTO_PAIRS}
+class CandleBuffer:
+    # Fixed-capacity OHLCV history stored in one contiguous float64 array.
+    # Rows live in a window [start, end) of a 2x capacity array, so column views are
+    # zero-copy slices; when the window reaches the end it is shifted back to the front.
+    # Prefix sums of close, squared close and true range make SMA/std/ATR O(1).
+    COLUMNS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, maxlen):
+        self._maxlen = maxlen
+        self._data = np.zeros((2 * maxlen, 6))
+        self._sums = np.zeros((2 * maxlen + 1, 3))
+        self._start = 0
+        self._end = 0
+        self._ref = 0.0
+
+    @property
+    def maxlen(self):
+        return self._maxlen
+
+    @maxlen.setter
+    def maxlen(self, value):
+        self.resize(value)
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(self._start, self._end)[index]]
+        return self._row(self._index(index))
+
+    def __setitem__(self, index, candle):
+        i = self._index(index)
+        self._data[i] = candle[:6]
+        for j in range(i, self._end):
+            self._update_sums(j)
+
+    def __iter__(self):
+        for i in range(self._start, self._end):
+            yield self._row(i)
+
+    def _index(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("CandleBuffer index out of range")
+        return self._start + index
+
+    def _row(self, i):
+        row = self._data[i]
+        return (int(row[0]), *row[1:].tolist())
+
+    def _update_sums(self, i):
+        high, low, close = self._data[i, 2], self._data[i, 3], self._data[i, 4]
+        if i > self._start:
+            prev_close = self._data[i - 1, 4]
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        else:
+            tr = high - low
+        centered = close - self._ref
+        self._sums[i + 1] = self._sums[i] + (centered, centered * centered, tr)
+
+    def _rebuild(self):
+        # Recompute prefix sums for the live window (also re-centres them to limit float drift)
+        window = self._data[self._start:self._end]
+        self._sums[self._start] = 0.0
+        if not len(window):
+            return
+        self._ref = window[0, 4]
+        centered = window[:, 4] - self._ref
+        tr = window[:, 2] - window[:, 3]
+        if len(window) > 1:
+            prev_close = window[:-1, 4]
+            tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(window[1:, 2] - prev_close), np.abs(window[1:, 3] - prev_close)))
+        self._sums[self._start + 1:self._end + 1] = np.cumsum(np.column_stack((centered, centered * centered, tr)), axis=0)
+
+    def _compact(self):
+        size = len(self)
+        self._data[:size] = self._data[self._start:self._end]
+        self._start, self._end = 0, size
+        self._rebuild()
+
+    def append(self, candle):
+        if self._end == len(self._data):
+            self._compact()
+        if self._start == self._end:
+            self._ref = candle[4]
+        self._data[self._end] = candle[:6]
+        self._update_sums(self._end)
+        self._end += 1
+        if len(self) > self._maxlen:
+            self._start += 1
+
+    def extend(self, candles):
+        for candle in candles:
+            self.append(candle)
+
+    def clear(self):
+        self._start = self._end = 0
+
+    def resize(self, maxlen):
+        keep = self._data[max(self._start, self._end - maxlen):self._end].copy()
+        self._maxlen = maxlen
+        self._data = np.zeros((2 * maxlen, 6))
+        self._sums = np.zeros((2 * maxlen + 1, 3))
+        self._data[:len(keep)] = keep
+        self._start, self._end = 0, len(keep)
+        self._rebuild()
+
+    def load(self, candles):
+        # Replace the contents with the last maxlen rows of an (n, 6) array in one vectorized copy
+        candles = candles[-self._maxlen:]
+        self._data[:len(candles)] = candles
+        self._start, self._end = 0, len(candles)
+        self._rebuild()
+
+    def rows(self):
+        return self._data[self._start:self._end]
+
+    def column(self, name):
+        return self._data[self._start:self._end, self.COLUMNS.index(name)]
+
+    @property
+    def closes(self):
+        return self.column('close')
+
+    def _window_sums(self, period):
+        return self._sums[self._end] - self._sums[self._end - period]
+
+    def sma(self, period):
+        if period <= 0 or len(self) < period:
+            return 0.0
+        return self._window_sums(period)[0] / period + self._ref
+
+    def std(self, period):
+        if period <= 0 or len(self) < period:
+            return 0.0
+        total, total_sq, _ = self._window_sums(period)
+        mean = total / period
+        return float(np.sqrt(max(total_sq / period - mean * mean, 0.0)))
+
+    def atr(self, period):
+        # Mean true range over the last period candles, excluding the oldest (it has no previous close in the window)
+        if period < 2 or len(self) < period:
+            return 0.0
+        return (self._sums[self._end, 2] - self._sums[self._end - period + 1, 2]) / (period - 1)
+
+class ChartSeries:
+    # Chart points for one pair as column deques, with SMA values computed once per point
+    # from running window sums, so rendering never rescans the history
+    def __init__(self, maxlen=1000):
+        self.times = deque(maxlen=maxlen)
+        self.binance = deque(maxlen=maxlen)
+        self.coinbase = deque(maxlen=maxlen)
+        self.sma_fast = deque(maxlen=maxlen)
+        self.sma_slow = deque(maxlen=maxlen)
+        self._window = deque()
+        self._periods = None
+        self._sums = [0.0, 0.0]
+        self._count = 0
+
+    def __len__(self):
+        return len(self.times)
+
+    def _reset_window(self, periods):
+        self._periods = periods
+        self._window = deque(self._window, maxlen=max(periods))
+        self._sums = [sum(list(self._window)[-period:]) for period in periods]
+
+    def _update_sma(self, price):
+        periods = (CONFIG['SMA_FAST'], CONFIG['SMA_SLOW'])
+        if periods != self._periods:
+            self._reset_window(periods)
+        if price <= 0:
+            return float('nan'), float('nan')
+        for i, period in enumerate(periods):
+            if len(self._window) >= period:
+                self._sums[i] -= self._window[-period]
+            self._sums[i] += price
+        self._window.append(price)
+        self._count += 1
+        if self._count % 10000 == 0:
+            self._reset_window(periods)  # Drop accumulated float error
+        return tuple(self._sums[i] / period if len(self._window) >= period else float('nan') for i, period in enumerate(periods))
+
+    def append(self, timestamp, binance_price, coinbase_price):
+        sma_fast, sma_slow = self._update_sma(binance_price)
+        self.times.append(timestamp)
+        self.binance.append(binance_price)
+        self.coinbase.append(coinbase_price)
+        self.sma_fast.append(sma_fast)
+        self.sma_slow.append(sma_slow)
+
+    def trim(self, cutoff):
+        while self.times and self.times[0] < cutoff:
+            for column in (self.times, self.binance, self.coinbase, self.sma_fast, self.sma_slow):
+                column.popleft()
+
+def candle_file(data_dir, pair, exchange_name, ext, timeframe=None):
+    # The bot's own store is per timeframe; external Parquet/CSV files are looked up without one
+    name = f"{pair.replace('/', '_')}_{exchange_name}" + (f"_{timeframe}" if timeframe else '')
+    return os.path.join(data_dir, f"{name}.{ext}")
+
+class CandleStore:
+    # Append-only candle files (raw float64 rows of timestamp/open/high/low/close/volume) per
+    # pair and exchange. Only closed candles are written, so rows never change once stored;
+    # reads are memory-mapped, so a warm start only touches the pages it loads.
+    ROW_BYTES = 6 * 8
+
+    def __init__(self, data_dir=CONFIG['CANDLE_DATA_DIR'], timeframe=CONFIG['TIMEFRAME']):
+        self.data_dir = data_dir
+        self.timeframe = timeframe
+        self.last_timestamps = {}
+
+    def path(self, pair, exchange_name):
+        return candle_file(self.data_dir, pair, exchange_name, 'bin', self.timeframe)
+
+    def load(self, pair, exchange_name):
+        path = self.path(pair, exchange_name)
+        rows = os.path.getsize(path) // self.ROW_BYTES if os.path.exists(path) else 0
+        if not rows:
+            return None
+        candles = np.memmap(path, dtype=np.float64, mode='r', shape=(rows, 6))
+        self.last_timestamps[(pair, exchange_name)] = candles[-1, 0]
+        return candles
+
+    def last_timestamp(self, pair, exchange_name):
+        key = (pair, exchange_name)
+        if key not in self.last_timestamps:
+            candles = self.load(pair, exchange_name)
+            self.last_timestamps[key] = candles[-1, 0] if candles is not None else -1.0
+        return self.last_timestamps[key]
+
+    def append(self, pair, exchange_name, candles):
+        candles = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+        candles = candles[candles[:, 0] > self.last_timestamp(pair, exchange_name)]
+        if not len(candles):
+            return 0
+        os.makedirs(self.data_dir, exist_ok=True)
+        path = self.path(pair, exchange_name)
+        # Drop a partial row left by a crash mid-write, or every later row would be misaligned
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size % self.ROW_BYTES:
+            os.truncate(path, size - size % self.ROW_BYTES)
+        with open(path, 'ab') as f:
+            f.write(np.ascontiguousarray(candles).tobytes())
+        self.last_timestamps[(pair, exchange_name)] = candles[-1, 0]
+        return len(candles)
+
+    def persist(self, pair, exchange_name, history):
+        # Store every candle in the buffer except the newest, which may still be in progress
+        return self.append(pair, exchange_name, history.rows()[:-1])
+
+def trim_markers(markers, cutoff):
+    while markers and markers[0][0] < cutoff:
+        markers.popleft()
+
+class OrderBook:
+    # Top-N levels per side in preallocated (depth, 2) price/amount arrays, bids descending
+    # and asks ascending. Snapshots are copied in place; deltas update single levels.
+    def __init__(self, depth):
+        self.depth = depth
+        self.bids = np.zeros((depth, 2))
+        self.asks = np.zeros((depth, 2))
+        self.counts = {'bids': 0, 'asks': 0}
+        self.timestamp = 0.0
+
+    def levels(self, side):
+        return getattr(self, side)[:self.counts[side]]
+
+    def load(self, book, timestamp):
+        for side in ('bids', 'asks'):
+            levels = book.get(side) or []
+            n = min(len(levels), self.depth)
+            if n:
+                getattr(self, side)[:n] = np.asarray(levels[:n], dtype=np.float64)[:, :2]
+            self.counts[side] = n
+        self.timestamp = timestamp
+
+    def update(self, side, price, amount):
+        array = getattr(self, side)
+        n = self.counts[side]
+        keys = -array[:n, 0] if side == 'bids' else array[:n, 0]
+        key = -price if side == 'bids' else price
+        i = int(np.searchsorted(keys, key))
+        if i < n and array[i, 0] == price:
+            if amount > 0:
+                array[i, 1] = amount
+            else:
+                array[i:n - 1] = array[i + 1:n]
+                self.counts[side] = n - 1
+        elif amount > 0 and i < self.depth:
+            end = min(n, self.depth - 1)
+            array[i + 1:end + 1] = array[i:end]
+            array[i] = (price, amount)
+            self.counts[side] = end + 1
+
+    def apply(self, book, timestamp):
+        # Full snapshot unless the update is marked as a delta ({'snapshot': False, 'bids': [[price, amount], ...], ...})
+        if book.get('snapshot', True):
+            self.load(book, timestamp)
+            return
+        for side in ('bids', 'asks'):
+            for price, amount, *_ in book.get(side) or []:
+                self.update(side, price, amount)
+        self.timestamp = timestamp
+
+    def best(self, side):
+        return self.levels(side)[0, 0] if self.counts[side] else 0.0
+
+def fill_curve(levels):
+    # Cumulative (amount, cost) breakpoints for walking a side of the book, starting at (0, 0)
+    amounts = np.concatenate(([0.0], np.cumsum(levels[:, 1])))
+    costs = np.concatenate(([0.0], np.cumsum(levels[:, 0] * levels[:, 1])))
+    return amounts, costs
+
+def vwap(levels, amount):
+    # (average price, fillable amount) for taking amount from a side of the book
+    amounts, costs = fill_curve(levels)
+    filled = min(amount, amounts[-1])
+    if filled <= 0:
+        return 0.0, 0.0
+    return np.interp(filled, amounts, costs) / filled, filled
+
+def arbitrage_size(asks, bids, buy_fee, sell_fee, threshold, max_amount):
+    # Largest amount up to max_amount whose VWAP buy (asks) / sell (bids) edge net of fees
+    # still clears threshold, as (amount, buy_vwap, sell_vwap); amount is 0 when none does.
+    # The average edge only shrinks as both books are walked, so the breakpoints are scanned once.
+    ask_amounts, ask_costs = fill_curve(asks)
+    bid_amounts, bid_costs = fill_curve(bids)
+    limit = min(max_amount, ask_amounts[-1], bid_amounts[-1])
+    if limit <= 0:
+        return 0.0, 0.0, 0.0
+    sizes = np.union1d(ask_amounts, bid_amounts)
+    sizes = np.append(sizes[(sizes > 0) & (sizes < limit)], limit)
+    buy_cost = np.interp(sizes, ask_amounts, ask_costs)
+    sell_value = np.interp(sizes, bid_amounts, bid_costs)
+    edge = (sell_value * (1 - sell_fee) - buy_cost * (1 + buy_fee)) / buy_cost
+    profitable = np.flatnonzero(edge > threshold)
+    if not len(profitable):
+        return 0.0, 0.0, 0.0
+    k = profitable[-1]
+    size = sizes[k]
+    if k + 1 < len(sizes):
+        # Both fill curves are linear between breakpoints, so solve for where the edge reaches threshold
+        step = sizes[k + 1] - size
+        ask_price = (buy_cost[k + 1] - buy_cost[k]) / step
+        bid_price = (sell_value[k + 1] - sell_value[k]) / step
+        excess = sell_value[k] * (1 - sell_fee) - buy_cost[k] * (1 + buy_fee + threshold)
+        slope = bid_price * (1 - sell_fee) - ask_price * (1 + buy_fee + threshold)
+        if slope < 0:
+            size += min(step, -excess / slope)
+    return float(size), float(np.interp(size, ask_amounts, ask_costs) / size), float(np.interp(size, bid_amounts, bid_costs) / size)
+
+PRICE_HISTORY = {pair: ChartSeries(maxlen=1000) for pair in CRYPTO_PAIRS}
 TRADE_MARKERS = {pair: deque(maxlen=1000) for pair in CRYPTO_PAIRS}
 LAST_PRICES = {pair: {'binance': (0.0, 0), 'coinbase': (0.0, 0)} for pair in CRYPTO_PAIRS}
-OHLCV_HISTORY = {pair: {'binance': deque(maxlen=CONFIG['LIMIT']), 'coinbase': deque(maxlen=CONFIG['LIMIT'])} for pair in CRYPTO_PAIRS}
+BEST_BID_ASK = {pair: {'binance': (0.0, 0.0, 0), 'coinbase': (0.0, 0.0, 0)} for pair in CRYPTO_PAIRS}
+OHLCV_HISTORY = {pair: {'binance': CandleBuffer(CONFIG['LIMIT']), 'coinbase': CandleBuffer(CONFIG['LIMIT'])} for pair in CRYPTO_PAIRS}
+CANDLE_STORE = CandleStore()
+ORDER_BOOKS = {pair: {'binance': OrderBook(CONFIG['ORDER_BOOK_DEPTH']), 'coinbase': OrderBook(CONFIG['ORDER_BOOK_DEPTH'])} for pair in CRYPTO_PAIRS}
 
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
 def get_price_data(exchange, symbol, timeframe=CONFIG['TIMEFRAME'], limit=CONFIG['LIMIT']):
+    import ccxt
+    import pandas as pd
     if not exchange:
         print(f"Price fetch error for {symbol}: Exchange not initialized")
         return None
@@ -32,7 +396,140 @@ def get_price_data(exchange, symbol, timeframe=CONFIG['TIMEFRAME'], limit=CONFIG
         print(f"Price fetch error for {symbol}: {str(e)}")
         return None
 
+TIMEFRAME_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800, 'M': 2592000, 'y': 31536000}
+
+def timeframe_seconds(timeframe):
+    # Same result as ccxt.Exchange.parse_timeframe without importing ccxt
+    return int(timeframe[:-1]) * TIMEFRAME_UNITS[timeframe[-1]]
+
+def unified_symbol(exchange, symbol):
+    # ccxt keys fetch_tickers/fetch_trading_fees results by unified symbol ('BTC/USDC'), not the
+    # market id configured for Coinbase ('BTC-USDC')
+    try:
+        return exchange.market(symbol)['symbol']
+    except Exception:
+        return symbol.replace('-', '/')
+
+def upsert_candles(history, ohlcv):
+    # Candles arrive oldest first; the newest stored one may still be in progress
+    added = 0
+    for candle in ohlcv:
+        candle = tuple(candle)
+        if history and candle[0] == history[-1][0]:
+            history[-1] = candle
+        elif not history or candle[0] > history[-1][0]:
+            history.append(candle)
+            added += 1
+    return added
+
+class AsyncMarketData:
+    def __init__(self, exchange_names, log_func=print):
+        self.log = log_func
+        self.exchanges = {}
+        self.semaphores = {}
+        for name in exchange_names:
+            exchange = initialize_exchange(name, async_mode=True)
+            if exchange:
+                self.exchanges[name] = exchange
+                self.semaphores[name] = asyncio.Semaphore(CONFIG['MAX_CONCURRENT_REQUESTS'])
+
+    async def fetch_ohlcv(self, exchange_name, symbol, timeframe=CONFIG['TIMEFRAME'], limit=CONFIG['LIMIT'], since=None):
+        return await self.request(exchange_name, symbol, 'fetch_ohlcv', symbol, timeframe, since=since, limit=limit)
+
+    async def fetch_order_book(self, pair, exchange_name, symbol):
+        book = await self.request(exchange_name, symbol, 'fetch_order_book', symbol, CONFIG['ORDER_BOOK_DEPTH'])
+        if not book:
+            return None
+        ORDER_BOOKS[pair][exchange_name].load(book, time.time())
+        return ORDER_BOOKS[pair][exchange_name]
+
+    async def request(self, exchange_name, symbol, method, *args, **kwargs):
+        # Rate-limited call with a timeout; network errors and timeouts are retried with backoff
+        import ccxt
+        exchange = self.exchanges.get(exchange_name)
+        if not exchange:
+            return None
+        for attempt in range(CONFIG['FETCH_RETRIES']):
+            try:
+                async with self.semaphores[exchange_name]:
+                    await RATE_LIMITER.acquire(exchange_name, method, args, kwargs)
+                    with METRICS.timer('fetch_seconds', exchange=exchange_name, method=method, symbol=symbol):
+                        result = await asyncio.wait_for(getattr(exchange, method)(*args, **kwargs), CONFIG['FETCH_TIMEOUT'])
+                    RATE_LIMITER.observe(exchange_name, exchange)
+                    return result
+            except ccxt.NetworkError as e:
+                error = f"Network error: {str(e)}"
+            except ccxt.ExchangeError as e:
+                self.log(f"Exchange error fetching {symbol}: {str(e)}")
+                return None
+            except asyncio.TimeoutError:
+                error = f"Timed out after {CONFIG['FETCH_TIMEOUT']}s"
+            except Exception as e:
+                error = str(e)
+            if attempt < CONFIG['FETCH_RETRIES'] - 1:
+                await asyncio.sleep(CONFIG['FETCH_BACKOFF'] * (2 ** attempt))
+        self.log(f"{method} error for {symbol} on {exchange_name}: {error}")
+        return None
+
+    async def get_price_data(self, exchange_name, symbol, timeframe=CONFIG['TIMEFRAME'], limit=CONFIG['LIMIT']):
+        ohlcv = await self.fetch_ohlcv(exchange_name, symbol, timeframe, limit)
+        if not ohlcv:
+            return None
+        import pandas as pd
+        return pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+
+    async def ingest_ohlcv(self, pair, exchange_name, symbol, timeframe=CONFIG['TIMEFRAME']):
+        history = OHLCV_HISTORY[pair][exchange_name]
+        persist = CONFIG['CANDLE_STORE'] and timeframe == CONFIG['TIMEFRAME']
+        if not history and persist:
+            # Warm start from the local store; only the gap since its last candle is fetched below
+            stored = CANDLE_STORE.load(pair, exchange_name)
+            if stored is not None:
+                history.load(stored[-history.maxlen:])
+        if history:
+            missing = int((time.time() * 1000 - history[-1][0]) // (timeframe_seconds(timeframe) * 1000)) + 1
+            if missing > CONFIG['LIMIT']:
+                history.clear()  # Too far behind to bridge; start again from the latest window
+        if history:
+            limit = min(max(missing, CONFIG['INCREMENTAL_LIMIT']), CONFIG['LIMIT'])
+            ohlcv = await self.fetch_ohlcv(exchange_name, symbol, timeframe, limit=limit, since=int(history[-1][0]))
+        else:
+            ohlcv = await self.fetch_ohlcv(exchange_name, symbol, timeframe, limit=CONFIG['LIMIT'])
+        if not ohlcv:
+            return None
+        if upsert_candles(history, ohlcv) and persist:
+            CANDLE_STORE.persist(pair, exchange_name, history)
+        return history[-1]
+
+    async def ingest_batch(self, exchange_name, pair_symbols, timeframe=CONFIG['TIMEFRAME']):
+        # One fetch_tickers call refreshes every live candle; OHLCV is only fetched for pairs with
+        # no history or whose candle has rolled over. Returns {pair: latest candle or None}.
+        tickers = await self.request(exchange_name, 'tickers', 'fetch_tickers', list(pair_symbols.values())) or {}
+        exchange = self.exchanges.get(exchange_name)
+        now = time.time() * 1000
+        period = timeframe_seconds(timeframe) * 1000
+        results = {}
+        rollover = []
+        for pair, symbol in pair_symbols.items():
+            history = OHLCV_HISTORY[pair][exchange_name]
+            last = (tickers.get(unified_symbol(exchange, symbol)) or {}).get('last')
+            if history and last and now < history[-1][0] + period:
+                timestamp, open_, high, low, _, volume = history[-1]
+                history[-1] = (timestamp, open_, max(high, last), min(low, last), last, volume)
+                results[pair] = history[-1]
+            else:
+                rollover.append(pair)
+        candles = await asyncio.gather(*(self.ingest_ohlcv(pair, exchange_name, pair_symbols[pair], timeframe) for pair in rollover), return_exceptions=True)
+        for pair, candle in zip(rollover, candles):
+            results[pair] = None if isinstance(candle, Exception) else candle
+        return results
+
+    async def close(self):
+        await asyncio.gather(*(exchange.close() for exchange in self.exchanges.values()), return_exceptions=True)
+
 def calculate_atr(ohlcv_deque, period):
+    if isinstance(ohlcv_deque, CandleBuffer):
+        return ohlcv_deque.atr(period)
     ohlcv_list = list(ohlcv_deque)[-period:]
     if len(ohlcv_list) < period:
         return 0.0
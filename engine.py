@@ -0,0 +1,377 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+import argparse
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+from config import CONFIG, CRYPTO_PAIRS, PROFIT_TRACKER, STRATEGY_MASK
+from position_book import POSITION
+from exchanges import initialize_exchange, load_markets_cached, test_connectivity, validate_api_keys
+from trading_strategies import TradingStrategies
+from utils import get_timestamp, write_profit_report
+from profit_stats import PROFIT_STATS
+from journal import recover_state, reconcile
+from trade_memory import get_writer
+from data_manager import OHLCV_HISTORY, LAST_PRICES, AsyncMarketData
+from market_stream import MarketStream
+from event_bus import EventBus
+from rate_limiter import RATE_LIMITER
+from metrics import METRICS, STARTUP, serve_metrics, dump_metrics
+from log_sink import LogSink
+
+class TradingEngine:
+    def __init__(self, log_func=print):
+        self.log = log_func
+        self.binance = None
+        self.coinbase = None
+        self.strategies = None
+        self.initialized = threading.Event()
+        self.market_data = None
+        self.market_stream = None
+        self.event_bus = EventBus()
+        self.last_seen = {}
+        self.running = False
+        self.paused = False
+        self.selected_pair = next(iter(CRYPTO_PAIRS))
+        self.subscribers = []
+        self.snapshot_writers = set()
+        self.loop = None
+        self.thread = None
+
+    def initialize(self):
+        validate_api_keys()
+        if CONFIG['JOURNAL']:
+            with STARTUP.phase('recovery'):
+                recover_state(self.log)
+        with STARTUP.phase('trade_memory'):
+            get_writer()
+        # Both exchanges are set up side by side: client construction, then markets (from the
+        # disk cache when fresh) and the connectivity checks, so startup waits on the slower one only
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            with STARTUP.phase('exchange_clients'):
+                self.binance, self.coinbase = pool.map(initialize_exchange, ("binance", "coinbase"))
+            self.strategies = TradingStrategies(self.binance, self.coinbase, self.log)
+            if not self.coinbase:
+                for pair in list(CRYPTO_PAIRS.keys()):
+                    if 'coinbase' in CRYPTO_PAIRS[pair]:
+                        CRYPTO_PAIRS[pair].pop('coinbase')
+                        if not CRYPTO_PAIRS[pair]:
+                            del CRYPTO_PAIRS[pair]
+                self.log(f"{get_timestamp()} - Coinbase disabled; adjusted pairs: {list(CRYPTO_PAIRS.keys())}")
+            self.initialized.set()  # trading can start while the connectivity checks finish
+            with STARTUP.phase('connectivity'):
+                list(pool.map(self.connect, (self.binance, self.coinbase), ("Binance", "Coinbase")))
+        if CONFIG['JOURNAL'] and not CONFIG['DRY_RUN']:
+            reconcile(self.strategies.account_cache, self.log)
+        self.log(f"{get_timestamp()} - Exchange initialization complete.")
+
+    def connect(self, exchange, name):
+        if exchange:
+            try:
+                with STARTUP.phase(f"{name.lower()}_markets"):
+                    load_markets_cached(exchange, name.lower())
+            except Exception as e:
+                self.log(f"{get_timestamp()} - {name} market load failed: {str(e)}")
+        test_connectivity(exchange, name, self.log, self.strategies.account_cache)
+
+    def subscribe(self):
+        # Subscribers only ever see the latest snapshot; stale ones are dropped, never queued
+        subscriber = queue.Queue(maxsize=1)
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def snapshot(self, pair_prices):
+        pairs = {}
+        for pair, prices in pair_prices.items():
+            history = OHLCV_HISTORY[pair]['binance']
+            pairs[pair] = {
+                'binance': prices['binance'],
+                'coinbase': prices['coinbase'],
+                'volatility': history.std(CONFIG['VOLATILITY_WINDOW']),
+                'atr': history.atr(CONFIG['ATR_PERIOD']),
+                'candles': len(history),
+                'position': POSITION.snapshot(pair) if pair in POSITION else {},
+            }
+        return {
+            'time': time.time(),
+            'status': 'Paused' if self.paused else 'Running' if self.running else 'Stopped',
+            'pairs': pairs,
+            'total_profit': PROFIT_TRACKER['total_profit'],
+            'trade_count': PROFIT_TRACKER['trade_count'],
+            'last_trade_time': PROFIT_TRACKER['last_trade_time'],
+            'profit_stats': PROFIT_STATS.summary(),
+            'rate_limits': RATE_LIMITER.report(),
+        }
+
+    def publish(self, snapshot):
+        for subscriber in self.subscribers:
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                subscriber.put_nowait(snapshot)
+            except queue.Full:
+                pass
+        if self.snapshot_writers:
+            line = (json.dumps(snapshot) + "\n").encode()
+            for writer in list(self.snapshot_writers):
+                if writer.is_closing():
+                    self.snapshot_writers.discard(writer)
+                elif writer.transport.get_write_buffer_size() < CONFIG['SNAPSHOT_BUFFER_LIMIT']:
+                    writer.write(line)
+
+    async def serve_snapshots(self, host, port):
+        async def handle(reader, writer):
+            self.snapshot_writers.add(writer)
+            try:
+                await reader.read()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+            finally:
+                self.snapshot_writers.discard(writer)
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+    def price_sources(self):
+        return [(pair, name) for pair in CRYPTO_PAIRS for name in ('binance', 'coinbase')
+                if name in CRYPTO_PAIRS[pair] and (name == 'binance' or self.coinbase)]
+
+    def traded_pairs(self, pairs=None):
+        pairs = CRYPTO_PAIRS if pairs is None else pairs
+        if CONFIG['TRADE_ALL_PAIRS']:
+            return [pair for pair in pairs if pair in STRATEGY_MASK]
+        return [pair for pair in pairs if pair == self.selected_pair]
+
+    def current_prices(self):
+        # Latest price per pair and exchange; 0.0 when missing or older than PRICE_TTL
+        pair_prices = {pair: {'binance': 0.0, 'coinbase': 0.0} for pair in CRYPTO_PAIRS}
+        now = time.time()
+        for pair, name in self.price_sources():
+            if self.market_stream:
+                candle = self.market_stream.latest_candle(pair, name)
+                pair_prices[pair][name] = candle[4] if candle else 0.0
+            else:
+                price, updated = LAST_PRICES[pair][name]
+                if now - updated < CONFIG['PRICE_TTL']:
+                    pair_prices[pair][name] = price
+        return pair_prices
+
+    async def trading_loop(self):
+        LAST_REPORT_TIME = time.time()
+        self.log(f"{get_timestamp()} - Multi-Strategy Trading Started")
+        self.market_data = AsyncMarketData(['binance', 'coinbase'], self.log)
+        self.market_stream = None
+        poller = None
+        if CONFIG['MARKET_DATA_MODE'] == 'stream':
+            exchange_names = ['binance', 'coinbase'] if self.coinbase else ['binance']
+            if not CONFIG['STREAM_REPLAY_FILE'] and not CONFIG['STREAM_SERVER']:
+                # Websocket candle feeds only carry recent candles, so backfill history over REST once
+                await asyncio.gather(*(self.market_data.ingest_ohlcv(pair, name, CRYPTO_PAIRS[pair][name])
+                                       for pair in CRYPTO_PAIRS for name in exchange_names if name in CRYPTO_PAIRS[pair]))
+            self.market_stream = MarketStream(CRYPTO_PAIRS, exchange_names, self.log, event_bus=self.event_bus)
+            await self.market_stream.start()
+        else:
+            poller = asyncio.create_task(self.poll_market_data())
+        metrics_dump = None
+        if CONFIG['METRICS_DUMP_FILE']:
+            metrics_dump = asyncio.create_task(dump_metrics(CONFIG['METRICS_DUMP_FILE'], CONFIG['METRICS_DUMP_INTERVAL']))
+        # Strategies only run for pairs whose prices, candles or books changed since their last run
+        updates = self.event_bus.subscribe()
+        try:
+            while self.running:
+                if self.paused:
+                    await asyncio.sleep(1)
+                    continue
+                if not self.initialized.is_set():
+                    self.log(f"{get_timestamp()} - Waiting for exchange initialization...")
+                    await asyncio.to_thread(self.initialized.wait, 1)
+                    continue
+                changed = await updates.wait(CONFIG['EVENT_IDLE_TIMEOUT'])
+                if not self.running or self.paused:
+                    continue
+                try:
+                    iteration_start = time.perf_counter()
+                    pair_prices = self.current_prices()
+                    pairs = self.traded_pairs(changed)
+                    if pairs or CONFIG['TRIANGULAR_ARBITRAGE']:
+                        self.strategies.async_exchanges = self.market_data.exchanges
+                        await self.strategies.run_strategies(pair_prices, pairs, changed)
+                    self.publish(self.snapshot(pair_prices))
+                    if pairs and not STARTUP.reported:
+                        STARTUP.record('first_tick')
+                        STARTUP.reported = True
+                        self.log(f"{get_timestamp()} - Startup timing: {STARTUP.report()}")
+                    METRICS.observe('loop_iteration_seconds', time.perf_counter() - iteration_start)
+
+                    if PROFIT_TRACKER['total_profit'] < -CONFIG['CIRCUIT_BREAKER_THRESHOLD'] * CONFIG['SIMULATED_BALANCE']:
+                        self.pause()
+                        self.log(f"{get_timestamp()} - Circuit Breaker Triggered: Loss exceeded {CONFIG['CIRCUIT_BREAKER_THRESHOLD']*100}%")
+
+                    if time.time() - LAST_REPORT_TIME >= 3600:
+                        write_profit_report(background=True)
+                        LAST_REPORT_TIME = time.time()
+                except Exception as e:
+                    self.log(f"{get_timestamp()} - Trading Loop Error: {str(e)}")
+        finally:
+            self.event_bus.unsubscribe(updates)
+            for task in (poller, metrics_dump):
+                if task:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+            if self.strategies:
+                self.strategies.async_exchanges = {}
+            if self.market_stream:
+                await self.market_stream.close()
+            await self.market_data.close()
+
+    async def poll_market_data(self):
+        # REST mode: poll candles (and order books for arbitrage pairs); changes are published to the event bus
+        while self.running:
+            if self.paused or not self.strategies:
+                await asyncio.sleep(1)
+                continue
+            try:
+                poll_start = time.perf_counter()
+                sources = self.price_sources()
+                names = list(dict.fromkeys(name for _, name in sources))
+                if CONFIG['BATCH_TICKERS']:
+                    tasks = [asyncio.create_task(self.ingest_batch(name, [pair for pair, source in sources if source == name])) for name in names]
+                else:
+                    tasks = [asyncio.create_task(self.get_price_data_async(CRYPTO_PAIRS[pair][name], pair, name)) for pair, name in sources]
+                book_tasks = []
+                if self.coinbase:
+                    # Arbitrage sizes from both order books; refresh them alongside the candles
+                    book_tasks = [asyncio.create_task(self.fetch_order_book(pair, name))
+                                  for pair in self.traded_pairs() if STRATEGY_MASK[pair]['arbitrage'] and 'coinbase' in CRYPTO_PAIRS[pair]
+                                  for name in ('binance', 'coinbase')]
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+                await asyncio.gather(*book_tasks, return_exceptions=True)
+                if CONFIG['BATCH_TICKERS']:
+                    batches = {name: batch if isinstance(batch, dict) else {} for name, batch in zip(names, results)}
+                    results = [batches[name].get(pair) for pair, name in sources]
+                for (pair, name), result in zip(sources, results):
+                    if isinstance(result, Exception) or result is None:
+                        self.log(f"{get_timestamp()} - {pair} - {name.capitalize()} Price Fetch Failed")
+                METRICS.observe('poll_iteration_seconds', time.perf_counter() - poll_start)
+            except Exception as e:
+                self.log(f"{get_timestamp()} - Market Data Poll Error: {str(e)}")
+            await asyncio.sleep(CONFIG['LOOP_INTERVAL'] if PROFIT_TRACKER['trade_count'] > 5 else 0.5)
+
+    def publish_if_changed(self, key, value, pair, exchange_name):
+        if self.last_seen.get(key) != value:
+            self.last_seen[key] = value
+            self.event_bus.publish(pair, exchange_name)
+
+    async def fetch_order_book(self, pair, exchange_name):
+        book = await self.market_data.fetch_order_book(pair, exchange_name, CRYPTO_PAIRS[pair][exchange_name])
+        if book:
+            self.publish_if_changed(('book', pair, exchange_name), (book.best('bids'), book.best('asks')), pair, exchange_name)
+        return book
+
+    def record_candle(self, pair, exchange_name, candle):
+        LAST_PRICES[pair][exchange_name] = (candle[4], time.time())
+        self.publish_if_changed(('candle', pair, exchange_name), candle, pair, exchange_name)
+
+    async def ingest_batch(self, exchange_name, pairs):
+        candles = await self.market_data.ingest_batch(exchange_name, {pair: CRYPTO_PAIRS[pair][exchange_name] for pair in pairs})
+        for pair, candle in candles.items():
+            if candle is not None:
+                self.record_candle(pair, exchange_name, candle)
+        return candles
+
+    async def get_price_data_async(self, symbol, pair, exchange_name):
+        if self.market_stream:
+            candle = self.market_stream.latest_candle(pair, exchange_name)
+        else:
+            candle = await self.market_data.ingest_ohlcv(pair, exchange_name, symbol)
+            if candle is not None:
+                self.record_candle(pair, exchange_name, candle)
+        if candle is None:
+            self.log(f"{get_timestamp()} - {pair} - {exchange_name} Data Fetch Failed: No data returned for {symbol}")
+        return candle
+
+    async def resize_history(self, length):
+        # Runs on the engine loop, so a resize never interleaves with an append or upsert on the same buffer
+        for exchanges in OHLCV_HISTORY.values():
+            for history in exchanges.values():
+                history.resize(length)
+
+    def submit(self, coro):
+        # Schedule a coroutine on the engine loop from another thread, or on a
+        # short-lived loop when trading has not been started (e.g. manual trades)
+        if self.running and self.loop and self.loop.is_running():
+            return asyncio.run_coroutine_threadsafe(coro, self.loop)
+        thread = threading.Thread(target=asyncio.run, args=(coro,), daemon=True)
+        thread.start()
+        return thread
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.paused = False
+            self.log(f"{get_timestamp()} - Trading Started")
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self._run_loop, daemon=True)
+            self.thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.trading_loop())
+
+    def stop(self):
+        self.running = False
+        self.paused = False
+        self.log(f"{get_timestamp()} - Trading Stopped")
+        write_profit_report()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+
+    def pause(self):
+        self.paused = not self.paused
+        self.log(f"{get_timestamp()} - Trading {'Paused' if self.paused else 'Resumed'}")
+
+    async def run(self, serve=None, metrics=None):
+        self.running = True
+        self.loop = asyncio.get_running_loop()
+        server = None
+        metrics_server = None
+        if serve:
+            host, port = serve.rsplit(':', 1)
+            server = await self.serve_snapshots(host, int(port))
+            self.log(f"{get_timestamp()} - Publishing snapshots on {serve}")
+        if metrics:
+            host, port = metrics.rsplit(':', 1)
+            metrics_server = await serve_metrics(host, int(port))
+            self.log(f"{get_timestamp()} - Serving metrics on http://{metrics}/metrics")
+        try:
+            await self.trading_loop()
+        finally:
+            if server:
+                server.close()
+                for writer in list(self.snapshot_writers):
+                    writer.close()
+            if metrics_server:
+                metrics_server.close()
+            write_profit_report()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Bobby-Bot without the GUI")
+    parser.add_argument("--serve", default=CONFIG['SNAPSHOT_SERVER'], help="host:port to publish JSON state snapshots on")
+    parser.add_argument("--metrics", default=CONFIG['METRICS_SERVER'], help="host:port for a Prometheus-style metrics endpoint")
+    args = parser.parse_args()
+    STARTUP.record('imports')
+    log_sink = LogSink(console=True)
+    atexit.register(log_sink.flush)
+    engine = TradingEngine(log_sink.log)
+    engine.initialize()
+    try:
+        asyncio.run(engine.run(args.serve, args.metrics))
+    except KeyboardInterrupt:
+        engine.running = False
+
+if __name__ == "__main__":
+    main()
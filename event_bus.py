@@ -0,0 +1,46 @@
+import asyncio
+
+class Subscription:
+    # Pending (pair -> exchanges) updates since the last wait. Updates that arrive while the
+    # subscriber is busy are merged into one batch rather than queued one by one.
+    def __init__(self, pairs=None, exchanges=None):
+        self.pairs = set(pairs) if pairs is not None else None
+        self.exchanges = set(exchanges) if exchanges is not None else None
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def matches(self, pair, exchange_name):
+        return (self.pairs is None or pair in self.pairs) and (self.exchanges is None or exchange_name in self.exchanges)
+
+    def put(self, pair, exchange_name):
+        self.pending.setdefault(pair, set()).add(exchange_name)
+        self.ready.set()
+
+    async def wait(self, timeout=None):
+        # Returns the coalesced updates, or an empty dict if nothing changed within timeout
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.ready.clear()
+        pending, self.pending = self.pending, {}
+        return pending
+
+class EventBus:
+    # Per-pair market data change notifications. Publish from the engine's event loop only.
+    def __init__(self):
+        self.subscriptions = []
+
+    def subscribe(self, pairs=None, exchanges=None):
+        subscription = Subscription(pairs, exchanges)
+        self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def publish(self, pair, exchange_name):
+        for subscription in self.subscriptions:
+            if subscription.matches(pair, exchange_name):
+                subscription.put(pair, exchange_name)
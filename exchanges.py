@@ -1,30 +1,84 @@
-import ccxt
 import os
 import sys
+import json
+import time
 from dotenv import load_dotenv
 import logging
 from utils import get_timestamp
-from config import EXCHANGE_QUOTE_CURRENCIES, CRYPTO_PAIRS
+from config import CONFIG, EXCHANGE_QUOTE_CURRENCIES, CRYPTO_PAIRS
 
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-def initialize_exchange(exchange_type):
+def exchange_credentials(exchange_type):
+    if exchange_type == "binance":
+        return {
+            'apiKey': os.getenv('BINANCE_API_KEY'),
+            'secret': os.getenv('BINANCE_SECRET'),
+            'enableRateLimit': True,
+            'verbose': True
+        }
+    elif exchange_type == "coinbase":
+        return {
+            'apiKey': os.getenv('COINBASE_API_KEY'),
+            'secret': os.getenv('COINBASE_SECRET'),
+            'enableRateLimit': True,
+            'options': {'createMarketBuyOrderRequiresPrice': False}
+        }
+    return None
+
+def market_cache_file(exchange_type):
+    return os.path.join(CONFIG['MARKET_CACHE_DIR'], f"{exchange_type}_markets.json")
+
+def seed_markets(exchange, exchange_type):
+    # Preload market metadata from the disk cache so the client's first call skips load_markets
+    if not CONFIG['MARKET_CACHE_TTL']:
+        return False
+    try:
+        with open(market_cache_file(exchange_type)) as f:
+            cached = json.load(f)
+        if time.time() - cached['time'] > CONFIG['MARKET_CACHE_TTL']:
+            return False
+        exchange.set_markets(cached['markets'], cached.get('currencies'))
+        return True
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"{get_timestamp()} - Ignoring market cache for {exchange_type}: {str(e)}")
+        return False
+
+def save_markets(exchange, exchange_type):
+    if not CONFIG['MARKET_CACHE_TTL'] or not exchange.markets:
+        return
+    os.makedirs(CONFIG['MARKET_CACHE_DIR'], exist_ok=True)
+    path = market_cache_file(exchange_type)
+    with open(path + ".tmp", 'w') as f:
+        json.dump({'time': time.time(), 'markets': exchange.markets, 'currencies': exchange.currencies}, f)
+    os.replace(path + ".tmp", path)
+
+def load_markets_cached(exchange, exchange_type):
+    # Markets from the cache when fresh, otherwise from the exchange (refreshing the cache)
+    if exchange.markets or seed_markets(exchange, exchange_type):
+        return exchange.markets
+    markets = exchange.load_markets()
+    save_markets(exchange, exchange_type)
+    return markets
+
+def initialize_exchange(exchange_type, async_mode=False):
+    # ccxt is imported on first use; it dominates the import time of everything that needs a client
+    if async_mode:
+        import ccxt.async_support as module
+    else:
+        import ccxt as module
     try:
-        if exchange_type == "binance":
-            return ccxt.binance({
-                'apiKey': os.getenv('BINANCE_API_KEY'),
-                'secret': os.getenv('BINANCE_SECRET'),
-                'enableRateLimit': True,
-                'verbose': True
-            })
-        elif exchange_type == "coinbase":
-            return ccxt.coinbase({
-                'apiKey': os.getenv('COINBASE_API_KEY'),
-                'secret': os.getenv('COINBASE_SECRET'),
-                'enableRateLimit': True,
-                'options': {'createMarketBuyOrderRequiresPrice': False}
-            })
+        if exchange_type in ("binance", "coinbase"):
+            credentials = exchange_credentials(exchange_type)
+            if async_mode and exchange_type in CONFIG['RATE_LIMITS']:
+                # The async clients share rate_limiter's weight budget instead of ccxt's per-client throttle
+                credentials['enableRateLimit'] = False
+            exchange = getattr(module, exchange_type)(credentials)
+            seed_markets(exchange, exchange_type)
+            return exchange
     except Exception as e:
         logger.error(f"{get_timestamp()} - Exchange Init Failed: {exchange_type} - {str(e)}")
         return None
@@ -36,7 +90,7 @@ def validate_api_keys():
     if not all([os.getenv('COINBASE_API_KEY'), os.getenv('COINBASE_SECRET')]):
         logger.warning("Coinbase API credentials missing! Proceeding without Coinbase.")
 
-def test_connectivity(exchange, name, log_func):
+def test_connectivity(exchange, name, log_func, account_cache=None):
     if exchange:
         try:
             pair_key = 'BTC/USDT'
@@ -44,6 +98,8 @@ def test_connectivity(exchange, name, log_func):
             ticker = CRYPTO_PAIRS[pair_key][name.lower()] if name.lower() in CRYPTO_PAIRS[pair_key] else 'BTC-USD'
             response = exchange.fetch_ticker(ticker)
             balance = exchange.fetch_balance()
+            if account_cache:
+                account_cache.store_balance(name.lower(), balance)
             balance_value = balance.get(currency, {}).get('free', None)
             if balance_value is None and name.lower() == 'coinbase':
                 balance_value = balance.get('USD', {}).get('free', None)
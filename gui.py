@@ -1,20 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 import threading
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-import matplotlib.dates as mdates
-import asyncio
-import numpy as np
-from config import CONFIG, CRYPTO_PAIRS as CONFIG_CRYPTO_PAIRS, POSITION, PROFIT_TRACKER
-from exchanges import initialize_exchange, test_connectivity, validate_api_keys
-from trading_strategies import TradingStrategies
+import queue
+from config import CONFIG, CRYPTO_PAIRS as CONFIG_CRYPTO_PAIRS, PROFIT_TRACKER
+from position_book import POSITION
+from engine import TradingEngine
+from log_sink import LogSink
+from metrics import STARTUP
 from utils import get_timestamp, write_profit_report
-from data_manager import OHLCV_HISTORY, PRICE_HISTORY, TRADE_MARKERS, LAST_PRICES
-from collections import deque
+from data_manager import PRICE_HISTORY, TRADE_MARKERS, trim_markers
 import time
 import os
+import atexit
 from datetime import datetime
 
 class TradingGUI:
@@ -33,32 +30,57 @@ class TradingGUI:
         self.dropdown_text = '#000000'
         self.button_bg = '#4A4A4A'
 
-        self.binance = None
-        self.coinbase = None
-        self.strategies = None
-
-        self.running = False
-        self.paused = False
+        self.log_sink = LogSink()
+        atexit.register(self.log_sink.flush)
+        self.engine = TradingEngine(self.log)
+        self.subscription = self.engine.subscribe()
         self.setup_styles()
         self.setup_gui()
 
-        def init_exchanges():
-            validate_api_keys()
-            self.binance = initialize_exchange("binance")
-            self.coinbase = initialize_exchange("coinbase")
-            self.strategies = TradingStrategies(self.binance, self.coinbase, self.log)
-            if not self.coinbase:
-                for pair in list(CONFIG_CRYPTO_PAIRS.keys()):
-                    if 'coinbase' in CONFIG_CRYPTO_PAIRS[pair]:
-                        CONFIG_CRYPTO_PAIRS[pair].pop('coinbase')
-                        if not CONFIG_CRYPTO_PAIRS[pair]:
-                            del CONFIG_CRYPTO_PAIRS[pair]
-                self.log(f"{get_timestamp()} - Coinbase disabled; adjusted pairs: {list(CONFIG_CRYPTO_PAIRS.keys())}")
-            test_connectivity(self.binance, "Binance", self.log)
-            test_connectivity(self.coinbase, "Coinbase", self.log)
-            self.log(f"{get_timestamp()} - Exchange initialization complete.")
-
-        threading.Thread(target=init_exchanges, daemon=True).start()
+        threading.Thread(target=self.engine.initialize, daemon=True).start()
+        self.root.after(self.frame_interval(), self.poll_snapshots)
+        self.root.after(int(CONFIG['LOG_FLUSH_INTERVAL'] * 1000), self.flush_log)
+
+    @property
+    def binance(self):
+        return self.engine.binance
+
+    @property
+    def coinbase(self):
+        return self.engine.coinbase
+
+    @property
+    def strategies(self):
+        return self.engine.strategies
+
+    @property
+    def running(self):
+        return self.engine.running
+
+    @property
+    def paused(self):
+        return self.engine.paused
+
+    @paused.setter
+    def paused(self, value):
+        self.engine.paused = value
+
+    def frame_interval(self):
+        return max(int(1000 / CONFIG['GUI_FPS']), 1)
+
+    def poll_snapshots(self):
+        # Render the engine's latest state on the Tk thread at a fixed frame rate
+        self.engine.selected_pair = self.crypto_var.get()
+        try:
+            snapshot = self.subscription.get_nowait()
+        except queue.Empty:
+            snapshot = None
+        if snapshot and self.crypto_var.get() in snapshot['pairs']:
+            try:
+                self.update_display(snapshot)
+            except Exception as e:
+                self.log(f"{get_timestamp()} - Display Update Failed: {str(e)}")
+        self.root.after(self.frame_interval(), self.poll_snapshots)
 
     def setup_styles(self):
         style = ttk.Style()
@@ -165,14 +187,9 @@ class TradingGUI:
                                            values=["1 Hour", "12 Hours", "24 Hours"], state="readonly")
         self.timeframe_combo.pack(anchor="nw", pady=5)
 
-        self.fig = Figure(figsize=(10, 4), dpi=100, facecolor=self.widget_bg)
-        self.ax = self.fig.add_subplot(111, facecolor=self.bg_color)
-        self.ax.tick_params(colors=self.text_color)
-        self.ax.grid(True, linestyle='--', alpha=0.3, color='#606060')
-        self.ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-        self.ax.xaxis.set_major_locator(mdates.HourLocator(interval=1))
-        self.canvas = FigureCanvasTkAgg(self.fig, master=chart_frame)
-        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        # matplotlib is the slowest import in the GUI, so the chart is built once the window is up
+        self.chart = None
+        self.root.after_idle(self.setup_chart, chart_frame)
 
         self.status_bar = ttk.Label(self.root, text="Idle", anchor="w", background=self.bg_color, foreground=self.text_color)
         self.status_bar.pack(side=tk.BOTTOM, fill="x", padx=10)
@@ -192,6 +209,19 @@ class TradingGUI:
         for label in self.status_labels:
             label.bind("<Button-3>", self.show_context_menu)
 
+    def setup_chart(self, chart_frame):
+        with STARTUP.phase('chart'):
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            from matplotlib.figure import Figure
+            from chart import ChartRenderer
+            self.fig = Figure(figsize=(10, 4), dpi=100, facecolor=self.widget_bg)
+            self.ax = self.fig.add_subplot(111, facecolor=self.bg_color)
+            self.ax.tick_params(colors=self.text_color)
+            self.ax.grid(True, linestyle='--', alpha=0.3, color='#606060')
+            self.canvas = FigureCanvasTkAgg(self.fig, master=chart_frame)
+            self.canvas.get_tk_widget().pack(fill="both", expand=True)
+            self.chart = ChartRenderer(self.fig, self.ax, self.canvas, self.text_color, self.widget_bg)
+
     def show_context_menu(self, event):
         widget = event.widget
         self.context_menu.entryconfigure("Paste", state="normal" if isinstance(widget, (tk.Entry, tk.Text)) else "disabled")
@@ -265,16 +295,29 @@ class TradingGUI:
     def refresh_prices(self):
         self.log(f"{get_timestamp()} - Refreshing prices manually...")
         current_pair = self.crypto_var.get()
-        asyncio.run_coroutine_threadsafe(self.get_price_data_async(self.binance, CONFIG_CRYPTO_PAIRS[current_pair]['binance'], current_pair, 'binance'), self.loop)
+        if not self.running:
+            self.log(f"{get_timestamp()} - Refresh Failed: Trading loop not running")
+            return
+        self.engine.submit(self.engine.get_price_data_async(CONFIG_CRYPTO_PAIRS[current_pair]['binance'], current_pair, 'binance'))
         if self.coinbase and 'coinbase' in CONFIG_CRYPTO_PAIRS[current_pair]:
-            asyncio.run_coroutine_threadsafe(self.get_price_data_async(self.coinbase, CONFIG_CRYPTO_PAIRS[current_pair], current_pair, 'coinbase'), self.loop)
+            self.engine.submit(self.engine.get_price_data_async(CONFIG_CRYPTO_PAIRS[current_pair]['coinbase'], current_pair, 'coinbase'))
 
     def log(self, message):
-        try:
-            self.log_text.insert(tk.END, f"{message}\n")
-            self.log_text.see(tk.END)
-        except Exception as e:
-            print(f"Log error: {str(e)}")
+        # Safe from any thread: only enqueues; flush_log renders batches on the Tk thread
+        self.log_sink.log(message)
+
+    def flush_log(self):
+        messages = self.log_sink.drain()
+        if messages:
+            try:
+                self.log_text.insert(tk.END, "\n".join(messages) + "\n")
+                lines = int(self.log_text.index('end-1c').split('.')[0])
+                if lines > CONFIG['LOG_SCROLLBACK']:
+                    self.log_text.delete("1.0", f"{lines - CONFIG['LOG_SCROLLBACK']}.0")
+                self.log_text.see(tk.END)
+            except Exception as e:
+                print(f"Log error: {str(e)}")
+        self.root.after(int(CONFIG['LOG_FLUSH_INTERVAL'] * 1000), self.flush_log)
 
     def clear_log(self):
         try:
@@ -293,9 +336,8 @@ class TradingGUI:
         CONFIG['SMA_FAST'] = self.sma_fast_var.get()
         CONFIG['SMA_SLOW'] = self.sma_slow_var.get()
         self.log(f"{get_timestamp()} - Configuration Updated")
-        for pair in OHLCV_HISTORY:
-            OHLCV_HISTORY[pair]['binance'].maxlen = CONFIG['LIMIT']
-            OHLCV_HISTORY[pair]['coinbase'].maxlen = CONFIG['LIMIT']
+        # The engine thread appends to these buffers, so the resize runs on its loop
+        self.engine.submit(self.engine.resize_history(max(CONFIG['LIMIT'], CONFIG['SMA_SLOW'], CONFIG['SMA_FAST'])))
 
     def cash_out(self):
         if not self.strategies:
@@ -303,76 +345,71 @@ class TradingGUI:
             return
 
         current_pair = self.crypto_var.get()
-        total_cashout_profit = 0.0
-        self.paused = True  # Pause trading to avoid conflicts
         self.log(f"{get_timestamp()} - Initiating Cash Out for {current_pair}")
 
         # Get current prices
         binance_price = float(self.price_var.get().replace('$', '')) if self.price_var.get() not in ["0.00", "N/A"] else 0
         coinbase_price = float(self.coinbase_price_var.get().replace('$', '')) if self.coinbase_price_var.get() not in ["0.00", "N/A"] else 0
+        self.engine.submit(self.cash_out_async(current_pair, binance_price, coinbase_price))
+
+    async def cash_out_async(self, current_pair, binance_price, coinbase_price):
+        total_cashout_profit = 0.0
+        self.paused = True  # Pause trading to avoid conflicts
 
         # Sell Binance holdings
-        if POSITION[current_pair]['binance']['holding'] and binance_price > 0:
-            amount = POSITION[current_pair]['binance']['amount']
+        binance_position = POSITION[current_pair]['binance'].state
+        if binance_position.holding and binance_price > 0:
+            amount = binance_position.amount
             symbol = CONFIG_CRYPTO_PAIRS[current_pair]['binance']
-            success = self.strategies.execute_trade(self.binance, "SELL", binance_price, amount, symbol, current_pair, "Cash Out")
+            success = await self.strategies.execute_trade(self.binance, "SELL", binance_price, amount, symbol, current_pair, "Cash Out")
             if success:
-                profit = (binance_price - POSITION[current_pair]['binance']['entry_price']) * amount
+                profit = (binance_price - binance_position.entry_price) * amount
                 fees = binance_price * amount * CONFIG['FEE_RATE_BINANCE']
                 total_cashout_profit += profit - fees
                 self.log(f"{get_timestamp()} - {current_pair} - Cash Out Binance: Sold {amount:.6f} at ${binance_price:.2f}, Net Profit: ${profit - fees:.2f}")
 
         # Sell Coinbase holdings
-        if self.coinbase and POSITION[current_pair]['coinbase']['holding'] and coinbase_price > 0:
-            amount = POSITION[current_pair]['coinbase']['amount']
+        coinbase_position = POSITION[current_pair]['coinbase'].state
+        if self.coinbase and coinbase_position.holding and coinbase_price > 0:
+            amount = coinbase_position.amount
             symbol = CONFIG_CRYPTO_PAIRS[current_pair]['coinbase']
-            success = self.strategies.execute_trade(self.coinbase, "SELL", coinbase_price, amount, symbol, current_pair, "Cash Out")
+            success = await self.strategies.execute_trade(self.coinbase, "SELL", coinbase_price, amount, symbol, current_pair, "Cash Out")
             if success:
-                profit = (coinbase_price - POSITION[current_pair]['coinbase']['entry_price']) * amount
+                profit = (coinbase_price - coinbase_position.entry_price) * amount
                 fees = coinbase_price * amount * CONFIG['FEE_RATE_COINBASE']
                 total_cashout_profit += profit - fees
                 self.log(f"{get_timestamp()} - {current_pair} - Cash Out Coinbase: Sold {amount:.6f} at ${coinbase_price:.2f}, Net Profit: ${profit - fees:.2f}")
 
-        # Update balance and reset positions
+        # execute_trade has already booked these sells in PROFIT_TRACKER, which sizing adds to SIMULATED_BALANCE
         if total_cashout_profit != 0:
-            CONFIG['SIMULATED_BALANCE'] += total_cashout_profit
-            PROFIT_TRACKER['total_profit'] += total_cashout_profit
-            self.log(f"{get_timestamp()} - Cash Out Complete: Total Profit ${total_cashout_profit:.2f}, New Balance ${CONFIG['SIMULATED_BALANCE']:.2f}")
-            write_profit_report()
+            self.log(f"{get_timestamp()} - Cash Out Complete: Total Profit ${total_cashout_profit:.2f}, New Balance ${CONFIG['SIMULATED_BALANCE'] + PROFIT_TRACKER['total_profit']:.2f}")
+            write_profit_report(background=True)
 
         # Reset positions
-        POSITION[current_pair]['binance'].update({'holding': False, 'amount': 0.0, 'entry_price': 0.0})
-        POSITION[current_pair]['coinbase'].update({'holding': False, 'amount': 0.0, 'entry_price': 0.0})
+        POSITION.reset(current_pair)
         self.paused = False  # Resume trading
 
-    def update_display(self, pair_prices):
+    def update_display(self, snapshot):
         current_pair = self.crypto_var.get()
-        binance_price = pair_prices[current_pair]['binance']
-        coinbase_price = pair_prices[current_pair]['coinbase']
+        pair_state = snapshot['pairs'][current_pair]
+        binance_price = pair_state['binance']
+        coinbase_price = pair_state['coinbase']
+        self.status_bar.config(text=snapshot['status'])
 
         self.price_var.set(f"${binance_price:.2f}" if binance_price > 0 else "N/A")
         self.coinbase_price_var.set(f"${coinbase_price:.2f}" if coinbase_price > 0 else "N/A")
-        self.position_var.set(f"B: {'Holding' if POSITION[current_pair]['binance']['holding'] else 'None'} {POSITION[current_pair]['binance']['amount']:.6f} | "
-                             f"C: {'Holding' if POSITION[current_pair]['coinbase']['holding'] else 'None'} {POSITION[current_pair]['coinbase']['amount']:.6f}")
-        self.pl_var.set(f"${PROFIT_TRACKER['total_profit']:.2f}")
-        self.sim_balance_display_var.set(f"${CONFIG['SIMULATED_BALANCE'] + PROFIT_TRACKER['total_profit']:.2f}")
-        self.trade_count_var.set(str(PROFIT_TRACKER['trade_count']))
-        self.last_trade_var.set(PROFIT_TRACKER['last_trade_time'] or "N/A")
-        
-        binance_prices = [candle[4] for candle in OHLCV_HISTORY[current_pair]['binance']]
-        volatility = np.std(binance_prices[-CONFIG['VOLATILITY_WINDOW']:]) if len(binance_prices) >= CONFIG['VOLATILITY_WINDOW'] else 0
-        self.volatility_var.set(f"{volatility:.4f}")
-
-        if len(binance_prices) >= CONFIG['ATR_PERIOD']:
-            try:
-                from data_manager import calculate_atr
-                atr = calculate_atr(OHLCV_HISTORY[current_pair]['binance'], CONFIG['ATR_PERIOD'])
-                self.atr_var.set(f"{atr:.4f}")
-            except Exception as e:
-                self.atr_var.set("N/A")
-                self.log(f"{get_timestamp()} - ATR Calculation Failed: {str(e)}")
+        position = pair_state['position']
+        if position:
+            self.position_var.set(f"B: {'Holding' if position['binance']['holding'] else 'None'} {position['binance']['amount']:.6f} | "
+                                 f"C: {'Holding' if position['coinbase']['holding'] else 'None'} {position['coinbase']['amount']:.6f}")
         else:
-            self.atr_var.set("N/A")
+            self.position_var.set("N/A")
+        self.pl_var.set(f"${snapshot['total_profit']:.2f}")
+        self.sim_balance_display_var.set(f"${CONFIG['SIMULATED_BALANCE'] + snapshot['total_profit']:.2f}")
+        self.trade_count_var.set(str(snapshot['trade_count']))
+        self.last_trade_var.set(snapshot['last_trade_time'] or "N/A")
+        self.volatility_var.set(f"{pair_state['volatility']:.4f}")
+        self.atr_var.set(f"{pair_state['atr']:.4f}" if pair_state['candles'] >= CONFIG['ATR_PERIOD'] else "N/A")
 
         if binance_price > 0 and coinbase_price > 0:
             price_diff = (binance_price - coinbase_price) / coinbase_price
@@ -384,46 +421,17 @@ class TradingGUI:
             self.arbitrage_var.set("N/A")
             self.exchange_status_var.set("Idle")
 
-        PRICE_HISTORY[current_pair].append((time.time(), binance_price, coinbase_price))
+        series = PRICE_HISTORY[current_pair]
+        series.append(snapshot['time'], binance_price, coinbase_price)
         timeframe = self.timeframe_var.get()
         time_window = 3600 if timeframe == "1 Hour" else 43200 if timeframe == "12 Hours" else 86400
-        current_time = time.time()
-        PRICE_HISTORY[current_pair] = deque([(t, bp, cp) for t, bp, cp in PRICE_HISTORY[current_pair] if t >= current_time - time_window], maxlen=1000)
-        TRADE_MARKERS[current_pair] = deque([(t, p, s) for t, p, s in TRADE_MARKERS[current_pair] if t >= current_time - time_window], maxlen=1000)
-
-        self.log(f"{get_timestamp()} - {current_pair} - TRADE_MARKERS before plot: {list(TRADE_MARKERS[current_pair])}")
-    
-        self.ax.clear()
-        self.ax.grid(True, linestyle='--', alpha=0.3, color='#606060')
-        if PRICE_HISTORY[current_pair]:
-            times, b_prices, c_prices = zip(*PRICE_HISTORY[current_pair])
-            times = [datetime.fromtimestamp(t) for t in times]
-            if any(bp > 0 for bp in b_prices):
-                self.ax.plot(times, b_prices, '#00FFFF', label='Binance', linewidth=1.5)
-                if len(b_prices) >= CONFIG['SMA_SLOW']:
-                    try:
-                        sma_fast = [np.mean(list(b_prices)[max(0, i-CONFIG['SMA_FAST']):i+1]) for i in range(len(b_prices))]
-                        sma_slow = [np.mean(list(b_prices)[max(0, i-CONFIG['SMA_SLOW']):i+1]) for i in range(len(b_prices))]
-                        self.ax.plot(times, sma_fast, '#FF00FF', label='SMA Fast', linestyle='--')
-                        self.ax.plot(times, sma_slow, '#00FF00', label='SMA Slow', linestyle='--')
-                    except Exception as e:
-                        self.log(f"{get_timestamp()} - SMA Plot Error: {str(e)}")
-            if any(cp > 0 for cp in c_prices):
-                self.ax.plot(times, c_prices, '#FFFF00', label='Coinbase', linewidth=1.5)
-            buy_times = [datetime.fromtimestamp(t) for t, p, s in TRADE_MARKERS[current_pair] if s == "BUY"]
-            buy_prices = [p for t, p, s in TRADE_MARKERS[current_pair] if s == "BUY"]
-            sell_times = [datetime.fromtimestamp(t) for t, p, s in TRADE_MARKERS[current_pair] if s == "SELL"]
-            sell_prices = [p for t, p, s in TRADE_MARKERS[current_pair] if s == "SELL"]
-            if buy_times and buy_prices:
-                self.ax.scatter(buy_times, buy_prices, color='green', marker='^', label='Buy', s=100)
-            if sell_times and sell_prices:
-                self.ax.scatter(sell_times, sell_prices, color='red', marker='v', label='Sell', s=100)
-        self.ax.legend(facecolor=self.widget_bg, edgecolor=self.text_color, labelcolor=self.text_color)
-        self.ax.set_title(f"{current_pair} Price Movement (Local Time)", color=self.text_color)
-        self.ax.set_xlabel("Time (Local)", color=self.text_color)
-        self.ax.set_ylabel("Price (USD)", color=self.text_color)
-        self.fig.autofmt_xdate()
-        self.canvas.draw()
+        cutoff = time.time() - time_window
+        series.trim(cutoff)
+        trim_markers(TRADE_MARKERS[current_pair], cutoff)
+
+        # The chart redraws at most CHART_FPS and not at all while the window is minimized or hidden
+        if self.chart and self.root.state() != 'iconic' and self.canvas.get_tk_widget().winfo_viewable():
+            self.chart.render(current_pair, series, TRADE_MARKERS[current_pair], time_window)
 
     def manual_trade(self, signal):
         current_pair = self.crypto_var.get()
@@ -448,7 +456,7 @@ class TradingGUI:
             price = binance_price if exchange == self.binance else coinbase_price
             symbol = CONFIG_CRYPTO_PAIRS[current_pair]['binance'] if exchange == self.binance else CONFIG_CRYPTO_PAIRS[current_pair]['coinbase']
         else:
-            exchange = self.coinbase if POSITION[current_pair]['coinbase']['holding'] else self.binance if POSITION[current_pair]['binance']['holding'] else None
+            exchange = self.coinbase if POSITION[current_pair]['coinbase'].holding else self.binance if POSITION[current_pair]['binance'].holding else None
             if not exchange:
                 self.log(f"{get_timestamp()} - {current_pair} - Manual {signal} Failed: No position to sell")
                 return
@@ -457,122 +465,24 @@ class TradingGUI:
 
         if price > 0 and self.strategies:
             self.log(f"{get_timestamp()} - {current_pair} - Manual {signal} Initiated: {amount:.6f} {symbol} at ${price:.2f}")
-            self.strategies.execute_trade(exchange, signal, price, amount, symbol, current_pair, "Manual")
-
-    async def trading_loop(self):
-        from config import CRYPTO_PAIRS
-        LAST_REPORT_TIME = time.time()
-        self.log(f"{get_timestamp()} - Multi-Strategy Trading Started")
-        self.status_bar.config(text="Running")
-        while self.running:
-            if self.paused:
-                self.status_bar.config(text="Paused")
-                await asyncio.sleep(1)
-                continue
-            if not self.strategies:
-                self.log(f"{get_timestamp()} - Waiting for exchange initialization...")
-                await asyncio.sleep(1)
-                continue
-            try:
-                current_pair = self.crypto_var.get()
-                pair_prices = {pair: {'binance': 0.0, 'coinbase': 0.0} for pair in CRYPTO_PAIRS}
-
-                tasks = []
-                for pair in CRYPTO_PAIRS:
-                    if 'binance' in CRYPTO_PAIRS[pair]:
-                        tasks.append(asyncio.create_task(self.get_price_data_async(self.binance, CRYPTO_PAIRS[pair]['binance'], pair, 'binance')))
-                    if 'coinbase' in CRYPTO_PAIRS[pair] and self.coinbase:
-                        tasks.append(asyncio.create_task(self.get_price_data_async(self.coinbase, CRYPTO_PAIRS[pair]['coinbase'], pair, 'coinbase')))
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                idx = 0
-                current_time = time.time()
-                for pair in CRYPTO_PAIRS:
-                    if 'binance' in CRYPTO_PAIRS[pair]:
-                        result = results[idx]
-                        if isinstance(result, Exception) or result is None or result.empty:
-                            self.log(f"{get_timestamp()} - {pair} - Binance Price Fetch Failed")
-                            last_price, last_time = LAST_PRICES[pair]['binance']
-                            if current_time - last_time < CONFIG['PRICE_TTL']:
-                                pair_prices[pair]['binance'] = last_price
-                        else:
-                            last_candle = (result['timestamp'].iloc[-1], result['open'].iloc[-1], result['high'].iloc[-1],
-                                          result['low'].iloc[-1], result['close'].iloc[-1], result['volume'].iloc[-1])
-                            price = result['close'].iloc[-1]
-                            pair_prices[pair]['binance'] = price
-                            LAST_PRICES[pair]['binance'] = (price, current_time)
-                            OHLCV_HISTORY[pair]['binance'].append(last_candle)
-                        idx += 1
-                    if 'coinbase' in CRYPTO_PAIRS[pair] and self.coinbase:
-                        result = results[idx]
-                        if isinstance(result, Exception) or result is None or result.empty:
-                            self.log(f"{get_timestamp()} - {pair} - Coinbase Price Fetch Failed")
-                            last_price, last_time = LAST_PRICES[pair]['coinbase']
-                            if current_time - last_time < CONFIG['PRICE_TTL']:
-                                pair_prices[pair]['coinbase'] = last_price
-                        else:
-                            last_candle = (result['timestamp'].iloc[-1], result['open'].iloc[-1], result['high'].iloc[-1],
-                                          result['low'].iloc[-1], result['close'].iloc[-1], result['volume'].iloc[-1])
-                            price = result['close'].iloc[-1]
-                            pair_prices[pair]['coinbase'] = price
-                            LAST_PRICES[pair]['coinbase'] = (price, current_time)
-                            OHLCV_HISTORY[pair]['coinbase'].append(last_candle)
-                        idx += 1
-
-                await self.strategies.cross_exchange_arbitrage(pair_prices, current_pair)
-                await self.strategies.scalping_strategy(pair_prices, current_pair)
-                self.update_display(pair_prices)
-                
-                if PROFIT_TRACKER['total_profit'] < -CONFIG['CIRCUIT_BREAKER_THRESHOLD'] * CONFIG['SIMULATED_BALANCE']:
-                    self.pause_trading()
-                    self.log(f"{get_timestamp()} - Circuit Breaker Triggered: Loss exceeded {CONFIG['CIRCUIT_BREAKER_THRESHOLD']*100}%")
-                
-                if time.time() - LAST_REPORT_TIME >= 3600:
-                    write_profit_report()
-                    LAST_REPORT_TIME = time.time()
-
-                await asyncio.sleep(CONFIG['LOOP_INTERVAL'] if PROFIT_TRACKER['trade_count'] > 5 else 0.5)
-            except Exception as e:
-                self.log(f"{get_timestamp()} - Trading Loop Error: {str(e)}")
-
-    async def get_price_data_async(self, exchange, symbol, pair, exchange_name):
-        from data_manager import get_price_data
-        data = get_price_data(exchange, symbol)
-        if data is None or data.empty:
-            self.log(f"{get_timestamp()} - {pair} - {exchange_name} Data Fetch Failed: No data returned for {symbol}")
-        return data
+            self.engine.submit(self.strategies.execute_trade(exchange, signal, price, amount, symbol, current_pair, "Manual"))
 
     def start_trading(self):
         if not self.running:
-            self.running = True
-            self.paused = False
-            self.log(f"{get_timestamp()} - Trading Started")
-            self.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.loop)
-            self.thread = threading.Thread(target=lambda: self.loop.run_until_complete(self.trading_loop()))
-            self.thread.daemon = True
-            self.thread.start()
+            self.engine.start()
+            self.status_bar.config(text="Running")
 
     def stop_trading(self):
-        self.running = False
-        self.paused = False
-        self.log(f"{get_timestamp()} - Trading Stopped")
+        self.engine.stop()
         self.status_bar.config(text="Stopped")
-        write_profit_report()
-        if hasattr(self, 'loop'):
-            self.loop.call_soon_threadsafe(self.loop.stop)
-        if hasattr(self, 'thread') and self.thread.is_alive():
-            self.thread.join(timeout=2.0)
 
     def pause_trading(self):
-        self.paused = not self.paused
-        self.log(f"{get_timestamp()} - Trading {'Paused' if self.paused else 'Resumed'}")
+        self.engine.pause()
         self.status_bar.config(text="Paused" if self.paused else "Running")
 
     def reset_positions(self):
         current_pair = self.crypto_var.get()
-        POSITION[current_pair]['binance'].update({'holding': False, 'amount': 0.0, 'entry_price': 0.0})
-        POSITION[current_pair]['coinbase'].update({'holding': False, 'amount': 0.0, 'entry_price': 0.0})
+        POSITION.reset(current_pair)
         self.log(f"{get_timestamp()} - {current_pair} - Positions Reset")
 
     def export_log(self):
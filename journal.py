@@ -0,0 +1,228 @@
+import os
+import glob
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from config import CONFIG, CRYPTO_PAIRS, PROFIT_TRACKER
+from position_book import POSITION, PositionState, FLAT, OPENING, OPEN, CLOSING
+from profit_stats import PROFIT_STATS, ProfitStats
+
+logger = logging.getLogger(__name__)
+
+def empty_state():
+    return {'seq': 0, 'positions': {}, 'profit': {'total_profit': 0.0, 'trade_count': 0, 'last_trade_time': None},
+            'trades': [], 'stats': ProfitStats()}
+
+def apply(state, record):
+    # Replays one journal record onto a state; shared by the writer's replica and by recovery
+    kind = record['type']
+    if kind == 'position':
+        state['positions'].setdefault(record['pair'], {})[record['exchange']] = [record['status'], record['amount'], record['entry_price']]
+    elif kind == 'trade':
+        trade = record['trade']
+        profit = state['profit']
+        profit['total_profit'] += trade['net_profit']
+        profit['trade_count'] += 1
+        profit['last_trade_time'] = record['last_trade_time']
+        state['trades'].append(trade)
+        state['stats'].record(trade['net_profit'], trade.get('pair'), trade.get('strategy'))
+    elif kind == 'report':
+        del state['trades'][:record['count']]
+        state['stats'].close_period()
+    state['seq'] = record['seq']
+
+class Journal:
+    # Append-only journal of position transitions and closed trades, plus periodic snapshots.
+    # record() only enqueues. A writer thread numbers the records, appends them as JSON lines
+    # and fsyncs once per drained batch (group commit). It also applies each record to its own
+    # replica of the state, so a snapshot always corresponds to an exact sequence number.
+    # A write error disables the journal for the session instead of risking a torn line mid-segment.
+    def __init__(self, directory=CONFIG['JOURNAL_DIR']):
+        self.directory = directory
+        self.queue = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.state = None
+        self.file = None
+        self.thread = None
+        self.active = False
+        self.since_snapshot = 0
+        self.last_snapshot = 0.0
+
+    def record(self, kind, **fields):
+        if self.active:
+            fields['type'] = kind
+            self.queue.put_nowait(fields)
+
+    def on_position(self, position):
+        state = position.state
+        self.record('position', pair=position.pair, exchange=position.exchange, status=state.status,
+                    amount=state.amount, entry_price=state.entry_price)
+
+    def snapshot_path(self):
+        return os.path.join(self.directory, 'snapshot.json')
+
+    def segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, 'journal_*.log')))
+
+    def recover(self):
+        # Latest snapshot plus every later record; a torn last line (crash mid-write) ends the replay
+        state = empty_state()
+        try:
+            with open(self.snapshot_path()) as f:
+                snapshot = json.load(f)
+            state.update(seq=snapshot['seq'], positions=snapshot['positions'], profit=snapshot['profit'], trades=snapshot['trades'])
+            state['stats'].load(snapshot['stats'])
+        except FileNotFoundError:
+            pass
+        replayed = 0
+        for segment in self.segments():
+            with open(segment) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record['seq'] > state['seq']:
+                        apply(state, record)
+                        replayed += 1
+        return state, replayed
+
+    def start(self, state):
+        self.state = state
+        os.makedirs(self.directory, exist_ok=True)
+        self.write_snapshot()
+        POSITION.listeners.append(self.on_position)
+        self.active = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while self.active:
+            try:
+                batch = [self.queue.get(timeout=CONFIG['JOURNAL_SNAPSHOT_INTERVAL'])]
+            except queue.Empty:
+                batch = []
+            with self.lock:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    self.fail(e, batch)
+
+    def fail(self, error, batch):
+        # Stop journaling for the session; recovery still has everything fsynced before the error
+        self.active = False
+        logger.error(f"Journal disabled after a write error, positions and PnL are no longer persisted: {str(error)}")
+        try:
+            while True:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        for item in batch:
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _write(self, batch):
+        # Events in the batch are flush() markers, set once the records before them are fsynced
+        try:
+            while len(batch) < 1000:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        markers = [item for item in batch if isinstance(item, threading.Event)]
+        lines = []
+        for record in batch:
+            if isinstance(record, threading.Event):
+                continue
+            record['seq'] = self.state['seq'] + 1
+            try:
+                line = json.dumps(record, separators=(',', ':'))
+            except (TypeError, ValueError) as e:
+                logger.error(f"Journal: skipped a {record['type']} record that cannot be serialised: {str(e)}")
+                continue
+            apply(self.state, record)
+            lines.append(line)
+        if lines:
+            self.file.write("\n".join(lines) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.since_snapshot += len(lines)
+        if self.since_snapshot >= CONFIG['JOURNAL_SNAPSHOT_RECORDS'] or \
+                (self.since_snapshot and time.monotonic() - self.last_snapshot >= CONFIG['JOURNAL_SNAPSHOT_INTERVAL']):
+            self.write_snapshot()
+        for marker in markers:
+            marker.set()
+
+    def write_snapshot(self):
+        # Snapshot the replica, then start a new segment and drop the ones the snapshot covers
+        state = self.state
+        path = self.snapshot_path()
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'seq': state['seq'], 'time': time.time(), 'positions': state['positions'], 'profit': state['profit'],
+                       'trades': state['trades'], 'stats': state['stats'].dump()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        if self.file:
+            self.file.close()
+        segment = os.path.join(self.directory, f"journal_{state['seq'] + 1:012d}.log")
+        for old in self.segments():
+            if old != segment:
+                os.remove(old)
+        self.file = open(segment, 'w')  # anything already in it (e.g. a torn line) is covered by the snapshot
+        self.since_snapshot = 0
+        self.last_snapshot = time.monotonic()
+
+    def flush(self, timeout=5.0):
+        # Wait until everything recorded before the call is fsynced (e.g. at exit); safe to call from any thread.
+        # The marker goes through the writer thread, so a record it is already holding is written first.
+        if self.active:
+            done = threading.Event()
+            self.queue.put_nowait(done)
+            done.wait(timeout)
+
+def recover_state(log_func=print):
+    # Rebuild POSITION and PROFIT_TRACKER from the journal, then start journaling. Orders that
+    # were in flight at shutdown are rolled back to their starting state and flagged for review.
+    if JOURNAL.thread:
+        return
+    start = time.perf_counter()
+    state, replayed = JOURNAL.recover()
+    for pair, exchanges in state['positions'].items():
+        for name, values in exchanges.items():
+            position = POSITION.get(pair, name)
+            if position is None:
+                continue
+            status, amount, entry_price = values
+            if status in (OPENING, CLOSING):
+                log_func(f"Journal: {pair} {name} had a {'BUY' if status == OPENING else 'SELL'} in flight at shutdown; "
+                         f"assuming it did not fill - check the exchange")
+                status = FLAT if status == OPENING else OPEN
+                values[0] = status
+            position.restore(PositionState(status, amount, entry_price))
+    PROFIT_TRACKER.update(state['profit'])
+    PROFIT_TRACKER['trades'] = list(state['trades'])
+    PROFIT_STATS.load(state['stats'].dump())
+    JOURNAL.start(state)
+    holding = [f"{pair}@{name}" for pair, exchanges in state['positions'].items() for name, values in exchanges.items() if values[0] == OPEN]
+    log_func(f"Journal: recovered seq {state['seq']} ({replayed} records replayed) in {(time.perf_counter() - start) * 1000:.1f}ms - "
+             f"total profit {PROFIT_TRACKER['total_profit']:.2f}, {PROFIT_TRACKER['trade_count']} trades, holding: {', '.join(holding) or 'none'}")
+
+def reconcile(account_cache, log_func=print):
+    # Compare recovered open positions with the free balances fetched by the connectivity checks
+    for pair in POSITION:
+        for name, position in POSITION[pair].items():
+            state = position.state
+            if not state.holding or name not in CRYPTO_PAIRS.get(pair, {}):
+                continue
+            base = CRYPTO_PAIRS[pair][name].replace('-', '/').split('/')[0]
+            free = account_cache.cached_free_balance(name, base)
+            if free is None:
+                log_func(f"Journal: cannot reconcile {pair} on {name}: no balance available")
+            elif free < state.amount * (1 - CONFIG['JOURNAL_RECONCILE_TOLERANCE']):
+                log_func(f"Journal: {pair} on {name} is recorded as holding {state.amount:.6f} {base} but only {free:.6f} is free on the exchange")
+
+JOURNAL = Journal()
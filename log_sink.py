@@ -0,0 +1,91 @@
+import os
+import sys
+import queue
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from config import CONFIG
+
+class LogSink:
+    # Non-blocking log pipeline: log() only enqueues the message. A background thread writes
+    # batches to a rotating file (and optionally stdout) and hands them to the GUI through a
+    # bounded deque, so trading threads never touch Tk or the disk.
+    def __init__(self, path=CONFIG['LOG_FILE'], max_bytes=CONFIG['LOG_MAX_BYTES'], backup_count=CONFIG['LOG_BACKUP_COUNT'],
+                 console=False, gui_buffer=CONFIG['LOG_SCROLLBACK']):
+        self.queue = queue.SimpleQueue()
+        self.pending = deque(maxlen=gui_buffer)
+        self.console = console
+        self.handler = None
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            self.handler.setFormatter(logging.Formatter("%(message)s"))
+        self.lock = threading.Lock()
+        self.dropped = 0  # messages that fell out of the GUI buffer before drain() picked them up
+        self.reported = 0
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def log(self, message):
+        self.queue.put_nowait(message)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            try:
+                while len(batch) < 1000:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            with self.lock:
+                self._write(batch)
+
+    def _write(self, batch):
+        # Caller holds self.lock. Events in the batch are flush() markers, set once what precedes them is written
+        messages = [item for item in batch if isinstance(item, str)]
+        if self.handler:
+            for message in messages:
+                self.handler.handle(logging.makeLogRecord({'msg': message}))
+            self.handler.flush()
+        if self.console and messages:
+            sys.stdout.write("\n".join(messages) + "\n")
+            sys.stdout.flush()
+        overflow = len(self.pending) + len(messages) - self.pending.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+        self.pending.extend(messages)
+        for item in batch:
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def drain(self):
+        # Messages not yet shown in the GUI, oldest first, preceded by a note if the buffer overflowed
+        messages = []
+        dropped = self.dropped - self.reported
+        if dropped:
+            self.reported += dropped
+            messages.append(f"... {dropped} log lines were not shown here (see {self.handler.baseFilename if self.handler else 'the console'})")
+        try:
+            while True:
+                messages.append(self.pending.popleft())
+        except IndexError:
+            pass
+        return messages
+
+    def flush(self, timeout=5.0):
+        # Wait until everything logged before the call is written (e.g. at exit); safe to call from any thread.
+        # The marker goes through the writer thread, so a batch it is already holding is written first.
+        done = threading.Event()
+        self.queue.put_nowait(done)
+        if done.wait(timeout):
+            return
+        # Writer thread stuck or gone: write what is left from here
+        batch = []
+        try:
+            while True:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        with self.lock:
+            self._write(batch)
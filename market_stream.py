@@ -0,0 +1,225 @@
+import asyncio
+import json
+import time
+import argparse
+from config import CONFIG, STRATEGY_MASK
+from data_manager import OHLCV_HISTORY, LAST_PRICES, BEST_BID_ASK, ORDER_BOOKS, CANDLE_STORE, upsert_candles
+
+class CcxtProAdapter:
+    def __init__(self, exchange_name):
+        import ccxt.pro as ccxtpro
+        from exchanges import exchange_credentials, seed_markets
+        self.exchange = getattr(ccxtpro, exchange_name)(exchange_credentials(exchange_name))
+        seed_markets(self.exchange, exchange_name)
+
+    async def watch_ticker(self, symbol):
+        return await self.exchange.watch_ticker(symbol)
+
+    async def watch_ohlcv(self, symbol, timeframe):
+        return await self.exchange.watch_ohlcv(symbol, timeframe)
+
+    async def watch_order_book(self, symbol, limit):
+        return await self.exchange.watch_order_book(symbol, limit)
+
+    async def close(self):
+        await self.exchange.close()
+
+class QueueAdapter:
+    # Base for offline feeds: events are routed into one queue per (kind, symbol)
+    def __init__(self, exchange_name):
+        self.exchange_name = exchange_name
+        self.queues = {}
+
+    def _queue(self, kind, symbol):
+        return self.queues.setdefault((kind, symbol), asyncio.Queue())
+
+    def dispatch(self, event):
+        if event.get('exchange') == self.exchange_name:
+            self._queue(event['type'], event['symbol']).put_nowait(event['data'])
+
+    async def watch_ticker(self, symbol):
+        return await self._queue('ticker', symbol).get()
+
+    async def watch_ohlcv(self, symbol, timeframe):
+        return await self._queue('ohlcv', symbol).get()
+
+    async def watch_order_book(self, symbol, limit):
+        return await self._queue('book', symbol).get()
+
+    async def close(self):
+        pass
+
+class ReplayAdapter(QueueAdapter):
+    def __init__(self, exchange_name, path, speed=1.0):
+        super().__init__(exchange_name)
+        self.path = path
+        self.speed = speed
+        self.task = None
+
+    async def start(self):
+        self.task = asyncio.create_task(self._replay())
+
+    async def _replay(self):
+        async for event in replay_events(self.path, self.speed):
+            self.dispatch(event)
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+
+class SocketAdapter(QueueAdapter):
+    def __init__(self, exchange_name, host, port):
+        super().__init__(exchange_name)
+        self.host = host
+        self.port = port
+        self.task = None
+        self.writer = None
+
+    async def start(self):
+        reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.task = asyncio.create_task(self._read(reader))
+
+    async def _read(self, reader):
+        while line := await reader.readline():
+            self.dispatch(json.loads(line))
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+        if self.writer:
+            self.writer.close()
+
+async def replay_events(path, speed=1.0):
+    # Each line: {"delay": seconds, "exchange": ..., "type": "ticker"|"ohlcv"|"book", "symbol": ..., "data": ...}
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            delay = event.get('delay', 0)
+            if delay and speed > 0:
+                await asyncio.sleep(delay / speed)
+            yield event
+
+async def serve_replay(path, host='127.0.0.1', port=8765, speed=1.0):
+    async def handle(reader, writer):
+        try:
+            async for event in replay_events(path, speed):
+                writer.write((json.dumps(event) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+def build_adapter(exchange_name):
+    if CONFIG['STREAM_REPLAY_FILE']:
+        return ReplayAdapter(exchange_name, CONFIG['STREAM_REPLAY_FILE'], CONFIG['STREAM_REPLAY_SPEED'])
+    if CONFIG['STREAM_SERVER']:
+        host, port = CONFIG['STREAM_SERVER'].rsplit(':', 1)
+        return SocketAdapter(exchange_name, host, int(port))
+    return CcxtProAdapter(exchange_name)
+
+class MarketStream:
+    def __init__(self, pairs, exchange_names, log_func=print, adapter_factory=build_adapter, event_bus=None):
+        self.pairs = pairs
+        self.log = log_func
+        self.event_bus = event_bus
+        self.adapters = {name: adapter_factory(name) for name in exchange_names}
+        self.ticker_updates = {}
+        self.candle_updates = {}
+        self.tasks = []
+
+    async def start(self):
+        for adapter in self.adapters.values():
+            if hasattr(adapter, 'start'):
+                await adapter.start()
+        for pair, symbols in self.pairs.items():
+            for exchange_name, symbol in symbols.items():
+                if exchange_name in self.adapters:
+                    self.tasks.append(asyncio.create_task(self._watch_ticker(pair, exchange_name, symbol)))
+                    self.tasks.append(asyncio.create_task(self._watch_ohlcv(pair, exchange_name, symbol)))
+                    if STRATEGY_MASK.get(pair, {}).get('arbitrage') and len(symbols) > 1:
+                        self.tasks.append(asyncio.create_task(self._watch_order_book(pair, exchange_name, symbol)))
+
+    async def _watch_ticker(self, pair, exchange_name, symbol):
+        adapter = self.adapters[exchange_name]
+        while True:
+            try:
+                ticker = await adapter.watch_ticker(symbol)
+                now = time.time()
+                BEST_BID_ASK[pair][exchange_name] = (ticker.get('bid') or 0.0, ticker.get('ask') or 0.0, now)
+                if ticker.get('last'):
+                    LAST_PRICES[pair][exchange_name] = (ticker['last'], now)
+                    self.ticker_updates[(pair, exchange_name)] = now
+                self.notify(pair, exchange_name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log(f"Ticker stream error for {symbol} on {exchange_name}: {str(e)}")
+                await asyncio.sleep(CONFIG['FETCH_BACKOFF'])
+
+    async def _watch_ohlcv(self, pair, exchange_name, symbol):
+        adapter = self.adapters[exchange_name]
+        while True:
+            try:
+                ohlcv = await adapter.watch_ohlcv(symbol, CONFIG['TIMEFRAME'])
+                if ohlcv:
+                    history = OHLCV_HISTORY[pair][exchange_name]
+                    if upsert_candles(history, ohlcv) and CONFIG['CANDLE_STORE']:
+                        CANDLE_STORE.persist(pair, exchange_name, history)
+                    self.candle_updates[(pair, exchange_name)] = time.time()
+                    self.notify(pair, exchange_name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log(f"OHLCV stream error for {symbol} on {exchange_name}: {str(e)}")
+                await asyncio.sleep(CONFIG['FETCH_BACKOFF'])
+
+    async def _watch_order_book(self, pair, exchange_name, symbol):
+        adapter = self.adapters[exchange_name]
+        while True:
+            try:
+                book = await adapter.watch_order_book(symbol, CONFIG['ORDER_BOOK_DEPTH'])
+                ORDER_BOOKS[pair][exchange_name].apply(book, time.time())
+                self.notify(pair, exchange_name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.log(f"Order book stream error for {symbol} on {exchange_name}: {str(e)}")
+                await asyncio.sleep(CONFIG['FETCH_BACKOFF'])
+
+    def notify(self, pair, exchange_name):
+        if self.event_bus:
+            self.event_bus.publish(pair, exchange_name)
+
+    def latest_candle(self, pair, exchange_name):
+        # The live candle, with its close replaced by the ticker's last price when that is newer
+        history = OHLCV_HISTORY[pair][exchange_name]
+        ticker_time = self.ticker_updates.get((pair, exchange_name), 0)
+        candle_time = self.candle_updates.get((pair, exchange_name), 0)
+        if not history or time.time() - max(ticker_time, candle_time) >= CONFIG['PRICE_TTL']:
+            return None
+        candle = history[-1]
+        if ticker_time > candle_time:
+            return candle[:4] + (LAST_PRICES[pair][exchange_name][0],) + candle[5:]
+        return candle
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        await asyncio.gather(*(adapter.close() for adapter in self.adapters.values()), return_exceptions=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded market data over a local socket")
+    parser.add_argument("path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(serve_replay(args.path, args.host, args.port, args.speed))
@@ -0,0 +1,156 @@
+import asyncio
+import bisect
+import json
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+# Bucket upper bounds in seconds: 10us .. ~84s, roughly x2 apart
+BUCKETS = tuple(1e-5 * 2 ** i for i in range(24))
+
+class Histogram:
+    # Fixed-bucket latency histogram; observe is a bisect plus two additions
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.lock = Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.total += value
+            self.count += 1
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        with self.lock:
+            counts, count = list(self.counts), self.count
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def summary(self):
+        return {'count': self.count, 'sum': self.total, 'p50': self.quantile(0.5), 'p99': self.quantile(0.99)}
+
+class Metrics:
+    def __init__(self):
+        self.histograms = {}
+        self.lock = Lock()
+
+    def histogram(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, name, value, **labels):
+        self.histogram(name, **labels).observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render_prometheus(self):
+        lines = []
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+            prefix = label_text + "," if label_text else ""
+            with histogram.lock:
+                counts, total, count = list(histogram.counts), histogram.total, histogram.count
+            cumulative = 0
+            for bound, n in zip(histogram.buckets, counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{prefix}le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{label_text}}} {total}")
+            lines.append(f"{name}_count{{{label_text}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        return [dict(name=name, labels=dict(labels), **histogram.summary()) for (name, labels), histogram in sorted(self.histograms.items())]
+
+class TimedLock:
+    # threading.Lock that records how long callers waited for it and how long it was held
+    def __init__(self, name):
+        self.lock = Lock()
+        self.wait = METRICS.histogram('lock_wait_seconds', lock=name)
+        self.hold = METRICS.histogram('lock_hold_seconds', lock=name)
+        self.acquired = 0.0
+
+    def __enter__(self):
+        start = time.perf_counter()
+        self.lock.acquire()
+        self.acquired = time.perf_counter()
+        self.wait.observe(self.acquired - start)
+        return self
+
+    def __exit__(self, *exc):
+        held = time.perf_counter() - self.acquired
+        self.lock.release()
+        self.hold.observe(held)
+
+class StartupTimer:
+    # Startup phases as (name, duration, seconds since start when it finished). Phases may run
+    # concurrently (the GUI comes up while exchanges connect), so each is timed on its own.
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+        self.reported = False
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def record(self, name, start=None):
+        # Without a start the phase is measured from process start (e.g. imports, first tick)
+        end = time.perf_counter()
+        duration = end - (self.start if start is None else start)
+        self.phases.append((name, duration, end - self.start))
+        METRICS.observe('startup_phase_seconds', duration, phase=name)
+
+    def report(self):
+        return ", ".join(f"{name} {duration * 1000:.0f}ms (at {at * 1000:.0f}ms)" for name, duration, at in self.phases)
+
+async def serve_metrics(host, port):
+    # Minimal HTTP endpoint returning the Prometheus text format for any GET
+    async def handle(reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = METRICS.render_prometheus().encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+async def dump_metrics(path, interval):
+    while True:
+        await asyncio.sleep(interval)
+        with open(path, 'w') as f:
+            json.dump({'time': time.time(), 'histograms': METRICS.snapshot()}, f)
+
+METRICS = Metrics()
+STARTUP = StartupTimer()
@@ -0,0 +1,127 @@
+from threading import Lock
+from typing import NamedTuple
+from config import CRYPTO_PAIRS
+
+FLAT = 'flat'
+OPENING = 'opening'  # BUY order in flight
+OPEN = 'open'
+CLOSING = 'closing'  # SELL order in flight
+
+# signal -> (state it starts from, in-flight state, state after the fill)
+TRANSITIONS = {'BUY': (FLAT, OPENING, OPEN), 'SELL': (OPEN, CLOSING, FLAT)}
+
+class PositionState(NamedTuple):
+    status: str = FLAT
+    amount: float = 0.0
+    entry_price: float = 0.0
+
+    @property
+    def holding(self):
+        return self.status in (OPEN, CLOSING)
+
+    @property
+    def pending(self):
+        return self.status in (OPENING, CLOSING)
+
+    def as_dict(self):
+        return {'holding': self.holding, 'status': self.status, 'amount': self.amount, 'entry_price': self.entry_price}
+
+class Position:
+    # One pair on one exchange. The state is an immutable tuple replaced as a whole, so readers
+    # take `position.state` without locking; writers compare-and-set it under the position's own
+    # lock, so trades on different pairs or exchanges never contend. Every change is passed to
+    # listener (still under the lock, so a position's changes are seen in order).
+    __slots__ = ('pair', 'exchange', 'state', 'lock', 'listener')
+
+    def __init__(self, pair, exchange, listener=None):
+        self.pair = pair
+        self.exchange = exchange
+        self.state = PositionState()
+        self.lock = Lock()
+        self.listener = listener
+
+    def transition(self, expected, status, amount=None, entry_price=None):
+        # Moves to status only from the expected status; returns the previous state, or None if it did not match
+        with self.lock:
+            current = self.state
+            if current.status != expected:
+                return None
+            self.state = PositionState(status, current.amount if amount is None else amount,
+                                       current.entry_price if entry_price is None else entry_price)
+            if self.listener:
+                self.listener(self)
+            return current
+
+    def begin(self, signal):
+        # Reserve the position for an order (FLAT -> OPENING for BUY, OPEN -> CLOSING for SELL)
+        start, pending, _ = TRANSITIONS[signal]
+        return self.transition(start, pending)
+
+    def commit(self, signal, amount, price):
+        # Record the fill; returns the in-flight state (its entry_price is the one a SELL closes)
+        _, pending, done = TRANSITIONS[signal]
+        if signal == "BUY":
+            return self.transition(pending, done, amount, price)
+        return self.transition(pending, done, 0.0)
+
+    def abort(self, signal):
+        # Release a reservation whose order did not fill; a no-op once the fill was committed
+        start, pending, _ = TRANSITIONS[signal]
+        return self.transition(pending, start)
+
+    def reset(self):
+        with self.lock:
+            self.state = PositionState()
+            if self.listener:
+                self.listener(self)
+
+    def restore(self, state):
+        # Recovery only: sets the state without notifying listeners
+        with self.lock:
+            self.state = state
+
+    @property
+    def holding(self):
+        return self.state.holding
+
+    @property
+    def amount(self):
+        return self.state.amount
+
+    @property
+    def entry_price(self):
+        return self.state.entry_price
+
+class PositionBook:
+    # pair -> exchange -> Position; the set of pairs and exchanges is fixed at startup
+    def __init__(self, pairs, exchanges=('binance', 'coinbase')):
+        self.listeners = []
+        self.positions = {pair: {name: Position(pair, name, self.notify) for name in exchanges} for pair in pairs}
+
+    def notify(self, position):
+        for listener in self.listeners:
+            listener(position)
+
+    def __getitem__(self, pair):
+        return self.positions[pair]
+
+    def __contains__(self, pair):
+        return pair in self.positions
+
+    def __iter__(self):
+        return iter(self.positions)
+
+    def keys(self):
+        return self.positions.keys()
+
+    def get(self, pair, exchange_name):
+        return self.positions.get(pair, {}).get(exchange_name)
+
+    def snapshot(self, pair):
+        return {name: position.state.as_dict() for name, position in self.positions[pair].items()}
+
+    def reset(self, pair):
+        for position in self.positions[pair].values():
+            position.reset()
+
+POSITION = PositionBook([pair for pair in CRYPTO_PAIRS if 'USDT' in pair])
@@ -0,0 +1,101 @@
+import math
+from threading import Lock
+
+class RunningStats:
+    # O(1) per trade: count, total, win rate, Welford mean/variance and max drawdown of cumulative PnL
+    __slots__ = ('count', 'wins', 'total', 'mean', 'm2', 'peak', 'max_drawdown')
+
+    def __init__(self):
+        self.count = 0
+        self.wins = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+
+    def add(self, net_profit):
+        self.count += 1
+        if net_profit > 0:
+            self.wins += 1
+        self.total += net_profit
+        delta = net_profit - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (net_profit - self.mean)
+        self.peak = max(self.peak, self.total)
+        self.max_drawdown = max(self.max_drawdown, self.peak - self.total)
+
+    @property
+    def win_rate(self):
+        return self.wins / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def dump(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    @classmethod
+    def restore(cls, values):
+        stats = cls()
+        for name, value in zip(cls.__slots__, values):
+            setattr(stats, name, value)
+        return stats
+
+    def summary(self):
+        return {'count': self.count, 'total': self.total, 'win_rate': self.win_rate, 'mean': self.mean,
+                'std': self.std, 'max_drawdown': self.max_drawdown}
+
+class ProfitStats:
+    # Running totals (since start), the current report period, and per-pair / per-strategy breakdowns
+    def __init__(self):
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.overall = RunningStats()
+            self.period = RunningStats()
+            self.by_pair = {}
+            self.by_strategy = {}
+
+    def record(self, net_profit, pair=None, strategy=None):
+        with self.lock:
+            self.overall.add(net_profit)
+            self.period.add(net_profit)
+            if pair:
+                self.by_pair.setdefault(pair, RunningStats()).add(net_profit)
+            if strategy:
+                self.by_strategy.setdefault(strategy, RunningStats()).add(net_profit)
+
+    def summary(self):
+        with self.lock:
+            return self.overall.summary()
+
+    def dump(self):
+        with self.lock:
+            return {'overall': self.overall.dump(), 'period': self.period.dump(),
+                    'pairs': {pair: stats.dump() for pair, stats in self.by_pair.items()},
+                    'strategies': {strategy: stats.dump() for strategy, stats in self.by_strategy.items()}}
+
+    def load(self, data):
+        with self.lock:
+            self.overall = RunningStats.restore(data['overall'])
+            self.period = RunningStats.restore(data['period'])
+            self.by_pair = {pair: RunningStats.restore(values) for pair, values in data['pairs'].items()}
+            self.by_strategy = {strategy: RunningStats.restore(values) for strategy, values in data['strategies'].items()}
+
+    def close_period(self):
+        # Summaries for a report; the period stats start over afterwards
+        with self.lock:
+            report = {
+                'period': self.period.summary(),
+                'overall': self.overall.summary(),
+                'pairs': {pair: stats.summary() for pair, stats in self.by_pair.items()},
+                'strategies': {strategy: stats.summary() for strategy, stats in self.by_strategy.items()},
+            }
+            self.period = RunningStats()
+        return report
+
+PROFIT_STATS = ProfitStats()
@@ -0,0 +1,129 @@
+import asyncio
+import heapq
+import itertools
+import time
+from threading import Lock
+from config import CONFIG
+
+ORDER_PATH = 0
+MARKET_DATA = 1
+
+def binance_order_book_weight(args, kwargs):
+    limit = args[1] if len(args) > 1 else kwargs.get('limit') or 100
+    return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+
+def binance_tickers_weight(args, kwargs):
+    symbols = args[0] if args else kwargs.get('symbols')
+    if not symbols:
+        return 80
+    return 2 if len(symbols) <= 20 else 40 if len(symbols) <= 100 else 80
+
+# Request weight per ccxt method (Binance spot REST weights); anything unlisted costs 1
+ENDPOINT_WEIGHTS = {
+    'binance': {
+        'fetch_ohlcv': 2,
+        'fetch_ticker': 2,
+        'fetch_tickers': binance_tickers_weight,
+        'fetch_order_book': binance_order_book_weight,
+        'fetch_balance': 20,
+        'fetch_trading_fees': 1,
+        'load_markets': 20,
+    },
+    'coinbase': {},
+}
+
+# Server-reported usage headers, used to resync the local budget with the exchange's count
+USED_WEIGHT_HEADERS = {'binance': 'x-mbx-used-weight-1m'}
+
+def endpoint_weight(exchange_name, method, args=(), kwargs=None):
+    weight = ENDPOINT_WEIGHTS.get(exchange_name, {}).get(method, 1)
+    return weight(args, kwargs or {}) if callable(weight) else weight
+
+class RateBudget:
+    # Token bucket of request weight refilled continuously at capacity/period. Waiters are
+    # served strictly in (priority, arrival) order, so order-path calls overtake queued
+    # market-data calls. State is guarded by a thread lock and waiters poll with short sleeps,
+    # so one budget can be shared by callers on different event loops.
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = Lock()
+        self.waiters = []
+        self.counter = itertools.count()
+        self.used = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, weight, priority=MARKET_DATA):
+        weight = min(weight, self.capacity)
+        entry = (priority, next(self.counter), weight)
+        with self.lock:
+            heapq.heappush(self.waiters, entry)
+        try:
+            while True:
+                with self.lock:
+                    self._refill()
+                    if self.waiters[0] is entry and self.tokens >= weight:
+                        heapq.heappop(self.waiters)
+                        self.tokens -= weight
+                        self.used += weight
+                        return
+                    delay = max((weight - self.tokens) / self.rate, 0.001) if self.waiters[0] is entry else CONFIG['RATE_LIMIT_POLL']
+                await asyncio.sleep(delay)
+        except BaseException:
+            with self.lock:
+                if entry in self.waiters:
+                    self.waiters.remove(entry)
+                    heapq.heapify(self.waiters)
+            raise
+
+    def sync_used(self, used):
+        # The exchange counts weight over its own window; never report more headroom than it does
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, max(self.capacity - used, 0.0))
+
+    def report(self):
+        with self.lock:
+            self._refill()
+            return {'remaining': round(self.tokens, 1), 'capacity': self.capacity, 'waiting': len(self.waiters), 'used': self.used}
+
+class RateLimiter:
+    def __init__(self, limits=None):
+        limits = CONFIG['RATE_LIMITS'] if limits is None else limits
+        self.budgets = {name: RateBudget(capacity, period) for name, (capacity, period) in limits.items()}
+
+    async def acquire(self, exchange_name, method, args=(), kwargs=None, priority=MARKET_DATA):
+        budget = self.budgets.get(exchange_name)
+        if budget:
+            await budget.acquire(endpoint_weight(exchange_name, method, args, kwargs), priority)
+
+    def observe(self, exchange_name, client):
+        header = USED_WEIGHT_HEADERS.get(exchange_name)
+        headers = getattr(client, 'last_response_headers', None) or {}
+        budget = self.budgets.get(exchange_name)
+        if header and budget:
+            used = next((value for key, value in headers.items() if key.lower() == header), None)
+            if used is not None:
+                budget.sync_used(float(used))
+
+    async def call(self, exchange_name, client, method, *args, priority=MARKET_DATA, **kwargs):
+        # Spend the endpoint's weight from the exchange budget, then make the call; sync clients run in a thread
+        await self.acquire(exchange_name, method, args, kwargs, priority)
+        func = getattr(client, method)
+        if asyncio.iscoroutinefunction(func):
+            result = await func(*args, **kwargs)
+        else:
+            result = await asyncio.to_thread(func, *args, **kwargs)
+        self.observe(exchange_name, client)
+        return result
+
+    def report(self):
+        return {name: budget.report() for name, budget in self.budgets.items()}
+
+RATE_LIMITER = RateLimiter()
@@ -0,0 +1,129 @@
+import os
+import random
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from config import CONFIG
+from position_book import POSITION
+from backtest import Backtester, load_candles
+
+# Suggested keys for --help; any numeric CONFIG key can be swept. MIN_PROFIT_MARGIN sets the dry-run
+# cost gate, which refuses every entry at the defaults
+SWEEP_KEYS = ['SMA_FAST', 'SMA_SLOW', 'SCALPING_THRESHOLD', 'CROSS_ARBITRAGE_THRESHOLD', 'STOP_LOSS_PERCENTAGE', 'MIN_PROFIT_MARGIN']
+
+# Per-worker views onto the parent's shared candle arrays, keyed by (pair, exchange_name)
+_candles = {}
+_segments = []
+
+def share_candles(datasets):
+    # Copy each candle array into a shared memory segment once; workers attach by name instead of unpickling copies
+    segments, specs = [], {}
+    for key, candles in datasets.items():
+        segment = shared_memory.SharedMemory(create=True, size=max(candles.nbytes, 1))
+        np.ndarray(candles.shape, dtype=candles.dtype, buffer=segment.buf)[:] = candles
+        segments.append(segment)
+        specs[key] = (segment.name, candles.shape, candles.dtype.str)
+    return segments, specs
+
+def attach_candles(specs):
+    for key, (name, shape, dtype) in specs.items():
+        segment = shared_memory.SharedMemory(name=name)
+        _segments.append(segment)
+        _candles[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+
+def run_config(pair, overrides, seed):
+    result = Backtester(pair, _candles[(pair, 'binance')], _candles.get((pair, 'coinbase')), overrides, seed).run()
+    result.pop('trades')
+    return dict(overrides, **result)
+
+def parse_value(text):
+    return int(text) if text.lstrip('-').isdigit() else float(text)
+
+def parse_grid(specs):
+    # KEY=v1,v2,... -> cartesian product of all listed values
+    keys, values = [], []
+    for spec in specs:
+        key, _, choices = spec.partition('=')
+        keys.append(key)
+        values.append([parse_value(choice) for choice in choices.split(',')])
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+def parse_random(specs, count, seed):
+    # KEY=lo:hi -> uniform samples; integer bounds sample integers
+    rng = random.Random(seed)
+    ranges = {}
+    for spec in specs:
+        key, _, bounds = spec.partition('=')
+        ranges[key] = [parse_value(bound) for bound in bounds.split(':')]
+    return [{key: rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else rng.uniform(lo, hi)
+             for key, (lo, hi) in ranges.items()} for _ in range(count)]
+
+def valid_config(overrides):
+    return overrides.get('SMA_FAST', CONFIG['SMA_FAST']) < overrides.get('SMA_SLOW', CONFIG['SMA_SLOW'])
+
+def run_sweep(data_dir, pairs, configs, workers=None, seed=0, log_func=print):
+    datasets = {}
+    for pair in pairs:
+        for exchange_name in ('binance', 'coinbase'):
+            candles = load_candles(data_dir, pair, exchange_name)
+            if candles is not None:
+                datasets[(pair, exchange_name)] = candles
+    pairs = [pair for pair in pairs if (pair, 'binance') in datasets]
+    configs = [overrides for overrides in configs if valid_config(overrides)]
+    if not pairs or not configs:
+        return pd.DataFrame()
+
+    segments, specs = share_candles(datasets)
+    rows = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=attach_candles, initargs=(specs,)) as pool:
+            futures = [pool.submit(run_config, pair, overrides, seed) for pair in pairs for overrides in configs]
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    rows.append(future.result())
+                except Exception as e:
+                    log_func(f"Sweep run failed: {str(e)}")
+                if done % 100 == 0 or done == len(futures):
+                    log_func(f"Sweep progress: {done}/{len(futures)}")
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+    return pd.DataFrame(rows).sort_values('pnl', ascending=False, ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid or random search over strategy parameters using backtests")
+    parser.add_argument("--data-dir", default=CONFIG['CANDLE_DATA_DIR'])
+    parser.add_argument("--pairs", nargs="+", default=list(POSITION.keys()))
+    parser.add_argument("--grid", nargs="+", default=[], metavar="KEY=v1,v2", help=f"values to try for any CONFIG key, e.g. {', '.join(SWEEP_KEYS)}")
+    parser.add_argument("--random", type=int, default=0, metavar="N", help="sample N configurations from --ranges")
+    parser.add_argument("--ranges", nargs="+", default=[], metavar="KEY=lo:hi", help="ranges for any CONFIG key")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output", help="write the full results table to this CSV file")
+    args = parser.parse_args()
+
+    configs = parse_grid(args.grid) if args.grid else []
+    if args.random:
+        configs += parse_random(args.ranges, args.random, args.seed)
+    for overrides in configs:
+        unknown = set(overrides) - set(CONFIG)
+        if unknown:
+            parser.error(f"Unknown config keys: {', '.join(sorted(unknown))}")
+    if not configs:
+        parser.error("Nothing to sweep: pass --grid and/or --random with --ranges")
+
+    results = run_sweep(args.data_dir, args.pairs, configs, args.workers, args.seed)
+    if results.empty:
+        print("No results")
+        return
+    print(results.head(args.top).to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import asyncio
+import time
+from config import CONFIG
+from data_manager import AsyncMarketData, OHLCV_HISTORY
+
+class FakeCoinbase:
+    # Tickers keyed by unified symbol, as ccxt returns them; markets are looked up by market id
+    def __init__(self, last):
+        self.last = last
+        self.ohlcv_calls = 0
+
+    def market(self, symbol):
+        return {'id': symbol, 'symbol': symbol.replace('-', '/')}
+
+    async def fetch_tickers(self, symbols):
+        return {self.market(symbol)['symbol']: {'last': self.last} for symbol in symbols}
+
+    async def fetch_ohlcv(self, *args, **kwargs):
+        self.ohlcv_calls += 1
+        return []
+
+def test_ingest_batch_updates_live_candle_from_coinbase_ticker_without_ohlcv(monkeypatch):
+    monkeypatch.setitem(CONFIG, 'CANDLE_STORE', False)
+    market_data = AsyncMarketData([])
+    exchange = FakeCoinbase(last=105.0)
+    market_data.exchanges['coinbase'] = exchange
+    market_data.semaphores['coinbase'] = asyncio.Semaphore(1)
+    history = OHLCV_HISTORY['BTC/USDT']['coinbase']
+    history.clear()
+    history.append((time.time() * 1000, 100.0, 101.0, 99.0, 100.0, 1.0))
+
+    results = asyncio.run(market_data.ingest_batch('coinbase', {'BTC/USDT': 'BTC-USDC'}))
+
+    assert exchange.ohlcv_calls == 0
+    assert results['BTC/USDT'][2] == 105.0 and results['BTC/USDT'][4] == 105.0
@@ -1,24 +1,104 @@
-import pandas as pd
+import os
+import atexit
+import sqlite3
+import logging
+import threading
+from datetime import datetime
 from config import CONFIG
+from utils import get_timestamp
 
-try:
-    TRADE_MEMORY = pd.read_csv("trade_memory.csv")
-    if not all(col in TRADE_MEMORY.columns for col in ["timestamp", "pair", "exchange", "entry_price", "exit_price", "profit", "sma_fast", "sma_slow"]):
-        raise ValueError("Invalid columns in trade_memory.csv")
-except (FileNotFoundError, ValueError):
-    TRADE_MEMORY = pd.DataFrame(columns=["timestamp", "pair", "exchange", "entry_price", "exit_price", "profit", "sma_fast", "sma_slow"])
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["timestamp", "pair", "exchange", "entry_price", "exit_price", "profit", "sma_fast", "sma_slow"]
+
+class TradeMemoryWriter:
+    # Append-only trade memory in SQLite (WAL). Rows are buffered in memory and written in
+    # batches by a background thread, so recording a trade is a list append.
+    def __init__(self, path=CONFIG['TRADE_MEMORY_DB'], flush_interval=CONFIG['TRADE_MEMORY_FLUSH_INTERVAL'],
+                 flush_size=CONFIG['TRADE_MEMORY_FLUSH_SIZE']):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.buffer = []
+        self.buffer_lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.conn = connect(path)
+        import_legacy_csv(self.conn)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def append(self, row):
+        with self.buffer_lock:
+            self.buffer.append(row)
+            size = len(self.buffer)
+        if size >= self.flush_size:
+            self.wake.set()
+
+    def _run(self):
+        while True:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self.buffer_lock:
+            rows, self.buffer = self.buffer, []
+        if not rows:
+            return
+        try:
+            with self.write_lock, self.conn:
+                self.conn.executemany(f"INSERT INTO trades ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+        except sqlite3.Error as e:
+            # The transaction rolled back; keep the rows (ahead of newer ones) for the next flush
+            with self.buffer_lock:
+                self.buffer[:0] = rows
+            logger.error(f"{get_timestamp()} - Trade memory flush failed, {len(rows)} rows kept for retry: {str(e)}")
+
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS trades (timestamp TEXT, pair TEXT, exchange TEXT, entry_price REAL, "
+                 "exit_price REAL, profit REAL, sma_fast REAL, sma_slow REAL)")
+    return conn
+
+def import_legacy_csv(conn, csv_path="trade_memory.csv"):
+    # One-time migration of the old pandas-written CSV; renamed afterwards so it is not imported twice
+    if not os.path.exists(csv_path):
+        return
+    import pandas as pd
+    df = pd.read_csv(csv_path)
+    if all(col in df.columns for col in COLUMNS):
+        with conn:
+            conn.executemany(f"INSERT INTO trades ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                             df[COLUMNS].itertuples(index=False, name=None))
+        os.replace(csv_path, csv_path + ".imported")
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    # Created by the engine at startup, so the connection and the legacy CSV import stay off the trading loop
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = TradeMemoryWriter()
+                atexit.register(_writer.flush)
+    return _writer
 
 def log_to_memory(pair, exchange, entry_price, exit_price, profit, sma_fast, sma_slow):
-    global TRADE_MEMORY
-    new_trade = pd.DataFrame({
-        "timestamp": [pd.Timestamp.now().isoformat()],
-        "pair": [pair],
-        "exchange": [exchange],
-        "entry_price": [entry_price],
-        "exit_price": [exit_price],
-        "profit": [profit],
-        "sma_fast": [sma_fast],
-        "sma_slow": [sma_slow]
-    })
-    TRADE_MEMORY = pd.concat([TRADE_MEMORY, new_trade], ignore_index=True)
-    TRADE_MEMORY.to_csv("trade_memory.csv", index=False)
\ No newline at end of file
+    get_writer().append((datetime.now().isoformat(), pair, exchange, entry_price, exit_price, profit, sma_fast, sma_slow))
+
+def load_trade_memory(path=CONFIG['TRADE_MEMORY_DB']):
+    import pandas as pd
+    if _writer is not None and _writer.path == path:
+        _writer.flush()
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=COLUMNS)
+    conn = connect(path)
+    try:
+        return pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM trades", conn)
+    finally:
+        conn.close()
@@ -0,0 +1,239 @@
+import os
+import re
+import csv
+import glob
+import json
+import argparse
+from datetime import datetime
+from threading import Lock
+import numpy as np
+from config import CONFIG
+
+# On-disk dtype per column; text columns are stored as int32 codes into the store's dictionary
+COLUMNS = {
+    'time': np.float64,
+    'hour': np.int8,
+    'signal': np.int32,
+    'pair': np.int32,
+    'strategy': np.int32,
+    'buy_price': np.float64,
+    'sell_price': np.float64,
+    'amount': np.float64,
+    'gross_profit': np.float64,
+    'fees': np.float64,
+    'net_profit': np.float64,
+    'latency': np.float64,
+    'slippage': np.float64,
+}
+TEXT_COLUMNS = ('signal', 'pair', 'strategy')
+NUMBER_COLUMNS = ('buy_price', 'sell_price', 'amount', 'gross_profit', 'fees', 'net_profit', 'latency', 'slippage')
+GROUP_KEYS = TEXT_COLUMNS + ('hour', 'date', 'latency')
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}$")
+
+def split_signal(signal):
+    # "Scalping SELL BTC/USDT" -> ("Scalping", "BTC/USDT"), for rows written before pair/strategy were recorded
+    parts = (signal or '').split()
+    strategy = parts[0] if parts else ''
+    pair = parts[-1] if len(parts) > 1 and '/' in parts[-1] else ''
+    return strategy, pair
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def read_column(path, dtype):
+    count = os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0
+    if not count:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+class TradeStore:
+    # Closed trades partitioned by local date: <root>/<YYYY-MM-DD>/<column>.bin holds one raw
+    # array per column, appended once per report. Queries memory-map only the partitions and
+    # columns they need. meta.json holds the text dictionaries, the committed row count of each
+    # partition and the report files already stored; rows past the committed count are a torn append.
+    def __init__(self, root=CONFIG['TRADE_STORE_DIR']):
+        self.root = root
+        self.lock = Lock()
+        self.dictionary = None
+        self.codes = None
+        self.sources = None
+        self.rows = None
+
+    def load_meta(self):
+        if self.dictionary is not None:
+            return
+        try:
+            with open(os.path.join(self.root, 'meta.json')) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = {'dictionary': {column: [] for column in TEXT_COLUMNS}, 'sources': [], 'rows': {}}
+        self.dictionary = meta['dictionary']
+        self.codes = {column: {value: code for code, value in enumerate(values)} for column, values in self.dictionary.items()}
+        self.sources = set(meta['sources'])
+        self.rows = meta.get('rows')
+        if self.rows is None:  # stores written before row counts were recorded: trust the shortest column
+            self.rows = {date: min(read_column(os.path.join(self.root, date, f"{column}.bin"), dtype).size for column, dtype in COLUMNS.items())
+                         for date in self.partitions()}
+
+    def save_meta(self):
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, 'meta.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'dictionary': self.dictionary, 'sources': sorted(self.sources), 'rows': self.rows}, f)
+        os.replace(path + '.tmp', path)
+
+    def encode(self, column, value):
+        value = value or ''
+        code = self.codes[column].get(value)
+        if code is None:
+            code = len(self.dictionary[column])
+            self.dictionary[column].append(value)
+            self.codes[column][value] = code
+        return code
+
+    def append(self, trades, source=None):
+        # Returns the number of trades stored; a source (report file name) is only ever stored once
+        with self.lock:
+            self.load_meta()
+            if source and source in self.sources:
+                return 0
+            partitions = {}
+            for trade in trades:
+                when = datetime.fromisoformat(trade['time'])
+                strategy, pair = split_signal(trade.get('signal'))
+                columns = partitions.setdefault(when.strftime('%Y-%m-%d'), {column: [] for column in COLUMNS})
+                columns['time'].append(when.timestamp())
+                columns['hour'].append(when.hour)
+                columns['signal'].append(self.encode('signal', trade.get('signal')))
+                columns['pair'].append(self.encode('pair', trade.get('pair') or pair))
+                columns['strategy'].append(self.encode('strategy', trade.get('strategy') or strategy))
+                for column in NUMBER_COLUMNS:
+                    columns[column].append(to_float(trade.get(column)))
+            # Columns are cut back to the committed row count first, so a torn append cannot misalign
+            # them. The new row counts, the dictionary and the source are then committed in one meta write.
+            for date, columns in partitions.items():
+                directory = os.path.join(self.root, date)
+                os.makedirs(directory, exist_ok=True)
+                rows = self.rows.get(date, 0)
+                for column, values in columns.items():
+                    path = os.path.join(directory, f"{column}.bin")
+                    if os.path.exists(path):
+                        os.truncate(path, rows * np.dtype(COLUMNS[column]).itemsize)
+                    with open(path, 'ab') as f:
+                        f.write(np.asarray(values, dtype=COLUMNS[column]).tobytes())
+                self.rows[date] = rows + len(columns['time'])
+            if source:
+                self.sources.add(source)
+            self.save_meta()
+            return len(trades)
+
+    def partitions(self, start=None, end=None):
+        if not os.path.isdir(self.root):
+            return []
+        return [date for date in sorted(os.listdir(self.root))
+                if DATE_PATTERN.match(date) and (start is None or date >= start) and (end is None or date <= end)]
+
+    def load(self, columns=COLUMNS, start=None, end=None):
+        # Column arrays across the partitions in [start, end] (inclusive YYYY-MM-DD dates), plus 'date'
+        with self.lock:
+            self.load_meta()
+        parts = {column: [] for column in columns}
+        dates = []
+        for date in self.partitions(start, end):
+            arrays = {column: read_column(os.path.join(self.root, date, f"{column}.bin"), COLUMNS[column]) for column in columns}
+            rows = min(self.rows.get(date, 0), *(len(array) for array in arrays.values()))
+            for column, array in arrays.items():
+                parts[column].append(array[:rows])
+            dates.append((date, rows))
+        data = {column: np.concatenate(arrays) if arrays else np.empty(0, dtype=COLUMNS[column]) for column, arrays in parts.items()}
+        data['date'] = np.repeat(np.arange(len(dates), dtype=np.int32), [rows for _, rows in dates])
+        data['dates'] = [date for date, _ in dates]
+        return data
+
+    def import_reports(self, report_dir, log_func=print):
+        # One-time import of hourly_report_*.csv files; files already stored are skipped
+        imported = 0
+        for path in sorted(glob.glob(os.path.join(report_dir, "hourly_report_*.csv"))):
+            if path.endswith(('_summary.csv', '_breakdown.csv')):
+                continue
+            with open(path, newline='') as f:
+                trades = list(csv.DictReader(f))
+            imported += self.append(trades, source=os.path.basename(path))
+        log_func(f"Imported {imported} trades from {report_dir}")
+        return imported
+
+def group_labels(data, key, dictionary, latency_edges):
+    # Integer group codes for one key and the label of each code
+    if key in TEXT_COLUMNS:
+        return data[key], dictionary[key]
+    if key == 'hour':
+        return data['hour'], [f"{hour:02d}:00" for hour in range(24)]
+    if key == 'date':
+        return data['date'], data['dates']
+    edges = np.asarray(latency_edges, dtype=np.float64)
+    codes = np.where(np.isnan(data['latency']), len(edges) + 1, np.digitize(data['latency'], edges))
+    labels = [f"<{edges[0]:g}s"] + [f"{low:g}-{high:g}s" for low, high in zip(edges[:-1], edges[1:])] + [f">={edges[-1]:g}s", "n/a"]
+    return codes, labels
+
+def query(store, by, start=None, end=None, latency_edges=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0)):
+    # PnL, trade count, win rate and mean per group, sorted by PnL; one vectorized pass per query
+    columns = {'net_profit'} | {key for key in by if key in TEXT_COLUMNS + ('hour', 'latency')}
+    data = store.load(columns, start, end)
+    if not len(data['net_profit']):
+        return []
+    keyed = [group_labels(data, key, store.dictionary, latency_edges) for key in by]
+    dims = [len(labels) for _, labels in keyed]
+    flat = np.ravel_multi_index([codes.astype(np.int64) for codes, _ in keyed], dims)
+    groups, inverse = np.unique(flat, return_inverse=True)
+    groups = np.unravel_index(groups, dims)
+    profit = data['net_profit']
+    counts = np.bincount(inverse)
+    pnl = np.bincount(inverse, weights=np.nan_to_num(profit))
+    wins = np.bincount(inverse, weights=profit > 0)
+    rows = []
+    for g in np.argsort(-pnl):
+        row = {key: labels[groups[k][g]] for k, (key, (_, labels)) in enumerate(zip(by, keyed))}
+        row.update({'trades': int(counts[g]), 'pnl': float(pnl[g]), 'win_rate': float(wins[g] / counts[g]), 'mean': float(pnl[g] / counts[g])})
+        rows.append(row)
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar trade history: import hourly reports and query PnL")
+    parser.add_argument("--root", default=CONFIG['TRADE_STORE_DIR'])
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="import existing hourly_report CSVs")
+    importer.add_argument("--report-dir", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "hourly_report"))
+    query_parser = commands.add_parser("query", help="PnL by signal, pair, strategy, hour, date and/or latency bucket")
+    query_parser.add_argument("--by", nargs="+", choices=GROUP_KEYS, default=['pair'])
+    query_parser.add_argument("--start", help="first date (YYYY-MM-DD)")
+    query_parser.add_argument("--end", help="last date (YYYY-MM-DD)")
+    query_parser.add_argument("--latency-buckets", nargs="+", type=float, default=[0.05, 0.1, 0.25, 0.5, 1.0, 2.0], metavar="SECONDS")
+    query_parser.add_argument("--top", type=int, default=50)
+    query_parser.add_argument("--output", help="write the full result table to this CSV file")
+    args = parser.parse_args()
+
+    store = TradeStore(args.root)
+    if args.command == "import":
+        store.import_reports(args.report_dir)
+        return
+    rows = query(store, args.by, args.start, args.end, sorted(args.latency_buckets))
+    if not rows:
+        print("No trades")
+        return
+    cells = [[f"{value:.6g}" if isinstance(value, float) else str(value) for value in row.values()] for row in rows[:args.top]]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(rows[0])]
+    for line in [list(rows[0])] + cells:
+        print("  ".join(cell.rjust(width) for cell, width in zip(line, widths)))
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+TRADE_STORE = TradeStore()
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,18 @@ import numpy as np
 import random
 import time
 import asyncio
-from threading import Lock
-from config import CONFIG, POSITION, PROFIT_TRACKER, CRYPTO_PAIRS
-from utils import get_timestamp, log_trade, log_to_memory
-from data_manager import OHLCV_HISTORY, TRADE_MARKERS, calculate_atr
-
-POSITION_LOCK = Lock()
-PROFIT_TRACKER_LOCK = Lock()
+from config import CONFIG, PROFIT_TRACKER, CRYPTO_PAIRS, STRATEGY_MASK
+from position_book import POSITION
+from utils import get_timestamp, log_trade, PROFIT_TRACKER_LOCK
+from trade_memory import log_to_memory
+from account_cache import AccountCache
+from data_manager import OHLCV_HISTORY, ORDER_BOOKS, TRADE_MARKERS, arbitrage_size, calculate_atr, unified_symbol
+from triangular import CycleGraph
+from rate_limiter import RATE_LIMITER, ORDER_PATH, MARKET_DATA
+from metrics import METRICS
+
+# Exchanges whose market data each per-pair strategy reads
+STRATEGY_INPUTS = {'arbitrage': frozenset(('binance', 'coinbase')), 'scalping': frozenset(('binance',))}
 
 class TradingStrategies:
     def __init__(self, binance, coinbase, log_func):
@@ -16,17 +21,42 @@ class TradingStrategies:
         self.coinbase = coinbase
         self.log = log_func
         self.trading_paused = False
-        CONFIG['DEFAULT_MAKER_FEE'] = CONFIG.get('FEE_RATE_BINANCE', 0.001)
-        CONFIG['DEFAULT_TAKER_FEE'] = CONFIG.get('FEE_RATE_BINANCE', 0.001)
+        self.pair_locks = {}
+        self.async_exchanges = {}
+        self.account_cache = AccountCache()
+        self.cycle_graphs = {}
+        self.missing_fees = set()  # (exchange, symbol) already reported as absent from fetch_trading_fees
+        # Clock, sleep and trade-memory hooks; the backtester swaps in a simulated clock
+        self.clock = time.time
+        self.sleep = asyncio.sleep
+        self.record_memory = True
+        self.cost_rejections = 0  # dry-run BUYs refused because the expected profit did not cover costs
         CONFIG['CIRCUIT_BREAKER_THRESHOLD'] = CONFIG.get('CIRCUIT_BREAKER_THRESHOLD', -1000.0)
 
+    async def exchange_call(self, exchange, exchange_name, method, *args, priority=ORDER_PATH):
+        # Prefer the engine's ccxt async client; fall back to the sync client in a worker thread.
+        # Calls spend the exchange's rate budget, ahead of queued market-data requests by default.
+        client = self.async_exchanges.get(exchange_name) or exchange
+        return await RATE_LIMITER.call(exchange_name, client, method, *args, priority=priority)
+
     async def fetch_fee_rate(self, exchange, symbol):
+        # (maker, taker); falls back to the exchange's own configured FEE_RATE_<EXCHANGE>
+        exchange_name = 'binance' if exchange == self.binance else 'coinbase'
+        default = CONFIG[f"FEE_RATE_{exchange_name.upper()}"]
         try:
-            fees = await exchange.fetch_trading_fees()
-            return fees[symbol]['maker'], fees[symbol]['taker']
+            fees = await self.account_cache.get_fees(exchange_name, lambda: self.exchange_call(exchange, exchange_name, 'fetch_trading_fees'))
         except Exception as e:
             self.log(f"{get_timestamp()} - Failed to fetch fee rates for {symbol}: {str(e)}")
-            return CONFIG['DEFAULT_MAKER_FEE'], CONFIG['DEFAULT_TAKER_FEE']
+            return default, default
+        # fetch_trading_fees is keyed by unified symbol; Coinbase pairs are configured by market id
+        key = unified_symbol(exchange, symbol)
+        rates = fees.get(key)
+        if rates is None:
+            if (exchange_name, key) not in self.missing_fees:
+                self.missing_fees.add((exchange_name, key))
+                self.log(f"{get_timestamp()} - No trading fee for {key} on {exchange_name}; using {default}")
+            return default, default
+        return rates['maker'], rates['taker']
 
     async def retry_operation(self, operation, max_retries=3, delay=1):
         for attempt in range(max_retries):
@@ -47,7 +77,9 @@ class TradingStrategies:
         self.trading_paused = False
         self.log(f"{get_timestamp()} - Trading resumed.")
 
-    def execute_trade(self, exchange, signal, price, amount, symbol, pair, trade_type="Auto"):
+    async def execute_trade(self, exchange, signal, price, amount, symbol, pair, trade_type="Auto", reserved=False):
+        # reserved: the caller has already moved the position to its in-flight state (and releases it)
+        signal_time = time.perf_counter()
         if self.trading_paused:
             self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} Skipped: Trading paused by circuit breaker")
             return False
@@ -58,11 +90,11 @@ class TradingStrategies:
 
         exchange_name = 'binance' if exchange == self.binance else 'coinbase'
         # Derive currency from symbol (e.g., BTC/USDT -> USDT, BTC/USDC -> USDC)
-        currency = symbol.split('/')[-1]
+        currency = symbol.replace('-', '/').split('/')[-1]
 
         if not CONFIG['DRY_RUN'] and signal == "BUY":
             try:
-                balance = exchange.fetch_balance().get(currency, {}).get('free', 0.0)
+                balance = await self.account_cache.get_free_balance(exchange_name, currency, lambda: self.exchange_call(exchange, exchange_name, 'fetch_balance'))
                 required_funds = price * amount
                 if balance < required_funds:
                     self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} Failed: Insufficient {currency} balance ({balance:.2f} < {required_funds:.2f})")
@@ -71,27 +103,37 @@ class TradingStrategies:
                 self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} Failed: Balance check error - {str(e)}")
                 return False
 
-        loop = asyncio.get_event_loop()
-        maker_fee, taker_fee = loop.run_until_complete(self.fetch_fee_rate(exchange, symbol))
+        maker_fee, taker_fee = await self.fetch_fee_rate(exchange, symbol)
         fee_rate = taker_fee
 
-        with POSITION_LOCK:
-            if pair not in POSITION or exchange_name not in POSITION[pair]:
-                self.log(f"{get_timestamp()} - {pair} - Invalid exchange or pair in POSITION")
-                return False
-
-            if signal == "BUY" and POSITION[pair][exchange_name]['holding']:
+        position = POSITION.get(pair, exchange_name)
+        if position is None:
+            self.log(f"{get_timestamp()} - {pair} - Invalid exchange or pair in POSITION")
+            return False
+        # Reserve the position before any await so a concurrent BUY/SELL on it is refused
+        if not reserved and position.begin(signal) is None:
+            state = position.state
+            if state.pending:
+                self.log(f"{get_timestamp()} - {pair} - {signal} skipped: {exchange_name} order already in flight")
+            elif signal == "BUY":
                 self.log(f"{get_timestamp()} - {pair} - Already holding, skipping BUY")
-                return False
-            if signal == "SELL" and not POSITION[pair][exchange_name]['holding']:
+            else:
                 self.log(f"{get_timestamp()} - {pair} - No position to SELL")
-                return False
+            return False
+        try:
+            return await self.fill_trade(position, exchange, exchange_name, signal, price, amount, symbol, pair, trade_type, fee_rate, signal_time)
+        finally:
+            position.abort(signal)
 
-        TRADE_MARKERS[pair].append((time.time(), price, signal))
+    async def fill_trade(self, position, exchange, exchange_name, signal, price, amount, symbol, pair, trade_type, fee_rate, signal_time):
+        TRADE_MARKERS[pair].append((self.clock(), price, signal))
 
         if CONFIG['DRY_RUN']:
             latency = random.uniform(CONFIG['LATENCY_MIN'], CONFIG['LATENCY_MAX'])
-            time.sleep(latency)
+            order_time = time.perf_counter()
+            METRICS.observe('signal_to_order_seconds', order_time - signal_time, exchange=exchange_name)
+            await self.sleep(latency)
+            METRICS.observe('order_to_fill_seconds', time.perf_counter() - order_time, exchange=exchange_name)
 
             if random.random() < CONFIG['FAILURE_RATE']:
                 self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} Failed: Simulated network error (Latency: {latency:.2f}s)")
@@ -100,14 +142,15 @@ class TradingStrategies:
             slippage_factor = CONFIG['SLIPPAGE'] * random.uniform(0.5, 2.0)
             adjusted_price = price * (1 + slippage_factor) if signal == "BUY" else price * (1 - slippage_factor)
 
-            if signal == "BUY":
+            if signal == "BUY" and trade_type != "Unwind":
                 expected_profit = (adjusted_price * (1 + CONFIG['MIN_PROFIT_MARGIN']) - adjusted_price) * amount
                 total_cost = adjusted_price * amount * (fee_rate + CONFIG['SLIPPAGE']) * 1.5
                 if expected_profit <= total_cost:
+                    self.cost_rejections += 1
                     self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} Skipped: Profit {expected_profit:.2f} < Cost {total_cost:.2f}")
                     return False
 
-            if signal == "SELL" and adjusted_price < POSITION[pair][exchange_name]['entry_price'] * (1 - CONFIG['STOP_LOSS_PERCENTAGE']):
+            if signal == "SELL" and adjusted_price < position.entry_price * (1 - CONFIG['STOP_LOSS_PERCENTAGE']):
                 self.log(f"{get_timestamp()} - {pair} - {trade_type} SELL Stop-Loss Triggered: {amount:.6f} {symbol} at ${adjusted_price:.2f}")
                 trade_type = "Stop-Loss"
 
@@ -117,41 +160,43 @@ class TradingStrategies:
                 self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} Partial Fill: {amount:.6f}/{original_amount:.6f}")
 
             self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} Executed (Dry Run): Amount: {amount:.6f} {symbol}, Price: ${adjusted_price:.2f}, Fees: ${adjusted_price * amount * fee_rate:.2f}, Slippage: {slippage_factor*100:.2f}%, Latency: {latency:.2f}s")
-            with POSITION_LOCK:
-                if signal == "BUY":
-                    POSITION[pair][exchange_name].update({'holding': True, 'amount': amount, 'entry_price': adjusted_price})
-                else:
-                    profit = (adjusted_price - POSITION[pair][exchange_name]['entry_price']) * amount
-                    fees = adjusted_price * amount * fee_rate
-                    POSITION[pair][exchange_name].update({'holding': False, 'amount': 0.0})
-                    log_trade(f"{trade_type} {signal} {pair}", [POSITION[pair][exchange_name]['entry_price'], adjusted_price], amount, profit - fees, profit, fees, latency, slippage_factor)
-                    if trade_type == "Scalping":
-                        log_to_memory(pair, exchange_name, POSITION[pair][exchange_name]['entry_price'], adjusted_price, profit, CONFIG['SMA_FAST'], CONFIG['SMA_SLOW'])
-
-            with PROFIT_TRACKER_LOCK:
-                if signal == "SELL":
-                    PROFIT_TRACKER['total_profit'] += profit - fees
-                    PROFIT_TRACKER['trade_count'] += 1
-                    PROFIT_TRACKER['last_trade_time'] = get_timestamp()
-                    if PROFIT_TRACKER['total_profit'] < CONFIG['CIRCUIT_BREAKER_THRESHOLD']:
-                        self.pause_trading()
-                        return False
+            previous = position.commit(signal, amount, adjusted_price)
+            if previous is None:
+                self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} not recorded: position was reset while the order was in flight")
+                return False
+            if signal == "SELL":
+                entry_price = previous.entry_price
+                profit = (adjusted_price - entry_price) * amount
+                fees = adjusted_price * amount * fee_rate
+                with PROFIT_TRACKER_LOCK:
+                    log_trade(f"{trade_type} {signal} {pair}", [entry_price, adjusted_price], amount, profit - fees, profit, fees, latency, slippage_factor, pair, trade_type)
+            if signal == "SELL" and trade_type == "Scalping" and self.record_memory:
+                log_to_memory(pair, exchange_name, entry_price, adjusted_price, profit, CONFIG['SMA_FAST'], CONFIG['SMA_SLOW'])
+            # Simulated fills leave the cached exchange balances alone; they mirror the real account
+
+            # log_trade already booked the PnL; only the circuit breaker is checked here
+            if signal == "SELL" and PROFIT_TRACKER['total_profit'] < -CONFIG['CIRCUIT_BREAKER_THRESHOLD'] * CONFIG['SIMULATED_BALANCE']:
+                self.pause_trading()
+                return False
             return True
 
         async def execute_real_trade():
             try:
                 order = None
+                order_time = time.perf_counter()
+                METRICS.observe('signal_to_order_seconds', order_time - signal_time, exchange=exchange_name)
                 if signal == "BUY":
                     if exchange_name == 'coinbase':
                         cost = amount * price
-                        order = await exchange.create_market_buy_order(symbol, cost)
+                        order = await self.exchange_call(exchange, exchange_name, 'create_market_buy_order', symbol, cost)
                         executed_amount = order['filled'] / price if order.get('filled') else cost / price
                     else:
-                        order = await exchange.create_market_buy_order(symbol, amount)
+                        order = await self.exchange_call(exchange, exchange_name, 'create_market_buy_order', symbol, amount)
                         executed_amount = order['filled'] if order.get('filled') else amount
                 elif signal == "SELL":
-                    order = await exchange.create_market_sell_order(symbol, amount)
+                    order = await self.exchange_call(exchange, exchange_name, 'create_market_sell_order', symbol, amount)
                     executed_amount = order['filled'] if order.get('filled') else amount
+                METRICS.observe('order_to_fill_seconds', time.perf_counter() - order_time, exchange=exchange_name)
 
                 if order and order.get('filled') and order['filled'] < amount:
                     self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} Partial Fill: {order['filled']:.6f}/{amount:.6f}")
@@ -159,31 +204,62 @@ class TradingStrategies:
 
                 fees = price * executed_amount * fee_rate
                 self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} Executed: Amount: {executed_amount:.6f} {symbol}, Price: ${price:.2f}, Fees: ${fees:.2f}")
+                self.account_cache.apply_fill(exchange_name, symbol, signal, executed_amount, price, fees)
 
-                with POSITION_LOCK:
-                    if signal == "BUY":
-                        POSITION[pair][exchange_name].update({'holding': True, 'amount': executed_amount, 'entry_price': price})
-                    else:
-                        profit = (price - POSITION[pair][exchange_name]['entry_price']) * executed_amount
-                        POSITION[pair][exchange_name].update({'holding': False, 'amount': 0.0})
-                        log_trade(f"{trade_type} {signal} {pair}", [POSITION[pair][exchange_name]['entry_price'], price], executed_amount, profit - fees, profit, fees, 0, 0)
-                        if trade_type == "Scalping":
-                            log_to_memory(pair, exchange_name, POSITION[pair][exchange_name]['entry_price'], price, profit, CONFIG['SMA_FAST'], CONFIG['SMA_SLOW'])
-
-                with PROFIT_TRACKER_LOCK:
-                    if signal == "SELL":
-                        PROFIT_TRACKER['total_profit'] += profit - fees
-                        PROFIT_TRACKER['trade_count'] += 1
-                        PROFIT_TRACKER['last_trade_time'] = get_timestamp()
-                        if PROFIT_TRACKER['total_profit'] < CONFIG['CIRCUIT_BREAKER_THRESHOLD']:
-                            self.pause_trading()
-                            return False
+                previous = position.commit(signal, executed_amount, price)
+                if previous is None:
+                    self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} filled but not recorded: position was reset while the order was in flight")
+                    return False
+                if signal == "SELL":
+                    entry_price = previous.entry_price
+                    profit = (price - entry_price) * executed_amount
+                    with PROFIT_TRACKER_LOCK:
+                        log_trade(f"{trade_type} {signal} {pair}", [entry_price, price], executed_amount, profit - fees, profit, fees, 0, 0, pair, trade_type)
+                if signal == "SELL" and trade_type == "Scalping" and self.record_memory:
+                    log_to_memory(pair, exchange_name, entry_price, price, profit, CONFIG['SMA_FAST'], CONFIG['SMA_SLOW'])
+
+                if signal == "SELL" and PROFIT_TRACKER['total_profit'] < -CONFIG['CIRCUIT_BREAKER_THRESHOLD'] * CONFIG['SIMULATED_BALANCE']:
+                    self.pause_trading()
+                    return False
                 return True
             except Exception as e:
+                # The order may or may not have reached the exchange; force a fresh balance next time
+                self.account_cache.invalidate_balance(exchange_name)
                 self.log(f"{get_timestamp()} - {pair} - {trade_type} {signal} Failed: {symbol} at ${price:.2f} - {str(e)}")
                 return False
 
-        return loop.run_until_complete(self.retry_operation(execute_real_trade))
+        return await self.retry_operation(execute_real_trade)
+
+    async def run_strategies(self, pair_prices, pairs, changed=None):
+        # changed maps pair -> exchanges with new data; strategies skip pairs whose inputs did not change
+        tasks = [self.run_pair_strategies(pair_prices, pair, changed.get(pair) if changed is not None else None) for pair in pairs]
+        labels = list(pairs)
+        if CONFIG['TRIANGULAR_ARBITRAGE']:
+            tasks.append(self.run_triangular(self.binance, 'binance'))
+            labels.append('Triangular')
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for label, result in zip(labels, results):
+            if isinstance(result, Exception):
+                self.log(f"{get_timestamp()} - {label} - Strategy Error: {str(result)}")
+
+    async def run_triangular(self, exchange, exchange_name):
+        # One cycle at a time per exchange; a cycle's legs spend the previous leg's fill
+        async with self.pair_locks.setdefault(f"triangular:{exchange_name}", asyncio.Lock()):
+            await self.triangular_arbitrage(exchange, exchange_name)
+
+    async def run_pair_strategies(self, pair_prices, pair, exchanges=None):
+        # Strategies on the same pair share POSITION entries, so they run one at a time per pair
+        mask = STRATEGY_MASK.get(pair, {})
+        async with self.pair_locks.setdefault(pair, asyncio.Lock()):
+            if mask.get('arbitrage') and len(CRYPTO_PAIRS.get(pair, {})) > 1 and self.inputs_changed('arbitrage', exchanges):
+                with METRICS.timer('strategy_seconds', strategy='arbitrage'):
+                    await self.cross_exchange_arbitrage(pair_prices, pair)
+            if mask.get('scalping') and self.inputs_changed('scalping', exchanges):
+                with METRICS.timer('strategy_seconds', strategy='scalping'):
+                    await self.scalping_strategy(pair_prices, pair)
+
+    def inputs_changed(self, strategy, exchanges):
+        return exchanges is None or not STRATEGY_INPUTS[strategy].isdisjoint(exchanges)
 
     async def cross_exchange_arbitrage(self, pair_prices, current_pair):
         if self.trading_paused:
@@ -201,22 +277,70 @@ class TradingStrategies:
             self.log(f"{get_timestamp()} - {current_pair} - Cross-Exchange Arbitrage Skipped: Invalid prices (Binance: {binance_price}, Coinbase: {coinbase_price})")
             return
 
-        price_diff = (binance_price - coinbase_price) / coinbase_price
         amount = min(CONFIG['MIN_TRADE_AMOUNT'], (CONFIG['SIMULATED_BALANCE'] + PROFIT_TRACKER['total_profit']) * CONFIG['TRADE_SIZE_PERCENTAGE'] / min(binance_price, coinbase_price))
-
-        if abs(price_diff) > CONFIG['CROSS_ARBITRAGE_THRESHOLD']:
-            if price_diff > 0:  # Buy Coinbase, Sell Binance
-                buy_success = self.execute_trade(self.coinbase, "BUY", coinbase_price, amount, CRYPTO_PAIRS[current_pair]['coinbase'], current_pair, "Arbitrage")
-                if buy_success:
-                    sell_success = self.execute_trade(self.binance, "SELL", binance_price, amount, CRYPTO_PAIRS[current_pair]['binance'], current_pair, "Arbitrage")
-                    if not sell_success:
-                        self.log(f"{get_timestamp()} - {current_pair} - Arbitrage Failed: Sell on Binance did not complete")
-            else:  # Buy Binance, Sell Coinbase
-                buy_success = self.execute_trade(self.binance, "BUY", binance_price, amount, CRYPTO_PAIRS[current_pair]['binance'], current_pair, "Arbitrage")
-                if buy_success:
-                    sell_success = self.execute_trade(self.coinbase, "SELL", coinbase_price, amount, CRYPTO_PAIRS[current_pair]['coinbase'], current_pair, "Arbitrage")
-                    if not sell_success:
-                        self.log(f"{get_timestamp()} - {current_pair} - Arbitrage Failed: Sell on Coinbase did not complete")
+        sized = await self.size_arbitrage(current_pair, amount)
+        if sized is None:
+            # No fresh order books (e.g. backtests): fall back to comparing candle closes
+            price_diff = (binance_price - coinbase_price) / coinbase_price
+            if abs(price_diff) <= CONFIG['CROSS_ARBITRAGE_THRESHOLD']:
+                return
+            buy_on_coinbase = price_diff > 0
+            buy_price, sell_price = (coinbase_price, binance_price) if buy_on_coinbase else (binance_price, coinbase_price)
+        else:
+            buy_on_coinbase, amount, buy_price, sell_price = sized
+            if amount <= 0:
+                return
+
+        buy_name, sell_name = ('coinbase', 'binance') if buy_on_coinbase else ('binance', 'coinbase')
+        buy_exchange, sell_exchange = getattr(self, buy_name), getattr(self, sell_name)
+        buy_position, sell_position = POSITION.get(current_pair, buy_name), POSITION.get(current_pair, sell_name)
+        if buy_position is None or sell_position is None:
+            return
+        # Both legs are reserved before either is submitted, so one leg never fires on its own
+        if buy_position.begin("BUY") is None:
+            self.log(f"{get_timestamp()} - {current_pair} - Arbitrage Skipped: {buy_name} position is not flat")
+            return
+        if sell_position.begin("SELL") is None:
+            buy_position.abort("BUY")
+            self.log(f"{get_timestamp()} - {current_pair} - Arbitrage Skipped: No {sell_name} position to SELL")
+            return
+        try:
+            buy_success, sell_success = await asyncio.gather(
+                self.execute_trade(buy_exchange, "BUY", buy_price, amount, CRYPTO_PAIRS[current_pair][buy_name], current_pair, "Arbitrage", reserved=True),
+                self.execute_trade(sell_exchange, "SELL", sell_price, amount, CRYPTO_PAIRS[current_pair][sell_name], current_pair, "Arbitrage", reserved=True))
+        finally:
+            buy_position.abort("BUY")
+            sell_position.abort("SELL")
+
+        # A single filled leg leaves the pair unhedged; reverse it on its own exchange
+        if buy_success and not sell_success:
+            self.log(f"{get_timestamp()} - {current_pair} - Arbitrage Failed: Sell on {sell_name} did not complete, unwinding the {buy_name} buy")
+            await self.unwind_leg(buy_exchange, buy_name, "SELL", buy_price, buy_position.amount, current_pair)
+        elif sell_success and not buy_success:
+            self.log(f"{get_timestamp()} - {current_pair} - Arbitrage Failed: Buy on {buy_name} did not complete, unwinding the {sell_name} sell")
+            await self.unwind_leg(sell_exchange, sell_name, "BUY", sell_price, amount, current_pair)
+
+    async def unwind_leg(self, exchange, exchange_name, signal, price, amount, pair):
+        if await self.execute_trade(exchange, signal, price, amount, CRYPTO_PAIRS[pair][exchange_name], pair, "Unwind"):
+            self.log(f"{get_timestamp()} - {pair} - Arbitrage leg on {exchange_name} unwound")
+        else:
+            self.log(f"{get_timestamp()} - {pair} - Arbitrage unwind {signal} on {exchange_name} failed: position left unhedged - check the exchange")
+
+    async def size_arbitrage(self, pair, max_amount):
+        # (buy_on_coinbase, amount, buy VWAP, sell VWAP) from both order books, or None when either book is stale
+        books = ORDER_BOOKS[pair]
+        now = self.clock()
+        if any(not book.counts['asks'] or not book.counts['bids'] or now - book.timestamp >= CONFIG['ORDER_BOOK_TTL'] for book in books.values()):
+            return None
+        _, binance_fee = await self.fetch_fee_rate(self.binance, CRYPTO_PAIRS[pair]['binance'])
+        _, coinbase_fee = await self.fetch_fee_rate(self.coinbase, CRYPTO_PAIRS[pair]['coinbase'])
+        threshold = CONFIG['CROSS_ARBITRAGE_THRESHOLD']
+        binance, coinbase = books['binance'], books['coinbase']
+        if binance.best('bids') > coinbase.best('asks'):
+            return (True,) + arbitrage_size(coinbase.levels('asks'), binance.levels('bids'), coinbase_fee, binance_fee, threshold, max_amount)
+        if coinbase.best('bids') > binance.best('asks'):
+            return (False,) + arbitrage_size(binance.levels('asks'), coinbase.levels('bids'), binance_fee, coinbase_fee, threshold, max_amount)
+        return False, 0.0, 0.0, 0.0
 
     async def scalping_strategy(self, pair_prices, current_pair):
         if self.trading_paused:
@@ -227,14 +351,13 @@ class TradingStrategies:
             self.log(f"{get_timestamp()} - {current_pair} - Scalping Failed: No OHLCV data")
             return
 
-        binance_data = list(OHLCV_HISTORY[current_pair]['binance'])
+        binance_data = OHLCV_HISTORY[current_pair]['binance']
         if len(binance_data) < max(CONFIG['SMA_FAST'], CONFIG['SMA_SLOW']):
             self.log(f"{get_timestamp()} - {current_pair} - Scalping Skipped: Insufficient data")
             return
 
-        closes = [candle[4] for candle in binance_data]
-        sma_fast = np.mean(closes[-CONFIG['SMA_FAST']:])
-        sma_slow = np.mean(closes[-CONFIG['SMA_SLOW']:])
+        sma_fast = binance_data.sma(CONFIG['SMA_FAST'])
+        sma_slow = binance_data.sma(CONFIG['SMA_SLOW'])
         current_price = pair_prices[current_pair]['binance']
 
         if current_price <= 0:
@@ -243,14 +366,110 @@ class TradingStrategies:
 
         amount = min(CONFIG['MIN_TRADE_AMOUNT'], (CONFIG['SIMULATED_BALANCE'] + PROFIT_TRACKER['total_profit']) * CONFIG['TRADE_SIZE_PERCENTAGE'] / current_price)
 
-        if sma_fast > sma_slow and not POSITION[current_pair]['binance']['holding']:
-            self.execute_trade(self.binance, "BUY", current_price, amount, CRYPTO_PAIRS[current_pair]['binance'], current_pair, "Scalping")
-        elif sma_fast < sma_slow and POSITION[current_pair]['binance']['holding']:
-            self.execute_trade(self.binance, "SELL", current_price, amount, CRYPTO_PAIRS[current_pair]['binance'], current_pair, "Scalping")
-
-    async def triangular_arbitrage(self, exchange, base_pair, quote_pair, bridge_pair):
+        # Crossovers must clear a SCALPING_THRESHOLD band; held positions also exit at the stop-loss price
+        position = POSITION[current_pair]['binance'].state
+        band = sma_slow * CONFIG['SCALPING_THRESHOLD']
+        stop_price = position.entry_price * (1 - CONFIG['STOP_LOSS_PERCENTAGE'])
+        if sma_fast > sma_slow + band and not position.holding:
+            await self.execute_trade(self.binance, "BUY", current_price, amount, CRYPTO_PAIRS[current_pair]['binance'], current_pair, "Scalping")
+        elif position.holding and (sma_fast < sma_slow - band or current_price < stop_price):
+            await self.execute_trade(self.binance, "SELL", current_price, amount, CRYPTO_PAIRS[current_pair]['binance'], current_pair, "Scalping")
+
+    async def load_cycle_graph(self, exchange, exchange_name):
+        graph = self.cycle_graphs.get(exchange_name)
+        if graph is None:
+            markets = await self.exchange_call(exchange, exchange_name, 'load_markets', priority=MARKET_DATA)
+            graph = CycleGraph(markets, CONFIG['TRIANGULAR_START_CURRENCIES'], CONFIG[f"FEE_RATE_{exchange_name.upper()}"])
+            self.cycle_graphs[exchange_name] = graph
+            self.log(f"{get_timestamp()} - {exchange_name} - Triangular Arbitrage: {len(graph)} cycles over {len(graph.symbols_in_cycles)} markets")
+        return graph
+
+    async def triangular_arbitrage(self, exchange, exchange_name='binance'):
         if self.trading_paused:
-            self.log(f"{get_timestamp()} - {base_pair}-{quote_pair}-{bridge_pair} - Triangular Arbitrage Skipped: Trading paused")
+            self.log(f"{get_timestamp()} - {exchange_name} - Triangular Arbitrage Skipped: Trading paused")
+            return
+        if not exchange:
+            return
+
+        graph = await self.load_cycle_graph(exchange, exchange_name)
+        if not len(graph):
+            return
+        graph.update(await self.exchange_call(exchange, exchange_name, 'fetch_tickers', graph.symbols_in_cycles, priority=MARKET_DATA))
+        best = graph.best()
+        if best is None:
+            return
+
+        cycle, log_return = best
+        start_currency = graph.paths[cycle][0]
+        start_amount = (CONFIG['SIMULATED_BALANCE'] + PROFIT_TRACKER['total_profit']) * CONFIG['TRADE_SIZE_PERCENTAGE']
+        self.log(f"{get_timestamp()} - {exchange_name} - Triangular Arbitrage Opportunity: {graph.describe(cycle)} ({np.expm1(log_return)*100:.3f}% net)")
+
+        if CONFIG['DRY_RUN']:
+            latency = random.uniform(CONFIG['LATENCY_MIN'], CONFIG['LATENCY_MAX']) * 3
+            await self.sleep(latency)
+            if random.random() < CONFIG['FAILURE_RATE']:
+                self.log(f"{get_timestamp()} - {exchange_name} - Triangular Arbitrage Failed: Simulated network error (Latency: {latency:.2f}s)")
+                return
+            slippage_factor = CONFIG['SLIPPAGE'] * random.uniform(0.5, 2.0)
+            end_amount = float(start_amount * np.exp(log_return) * (1 - slippage_factor) ** 3)
+        else:
+            end_amount = await self.execute_cycle(exchange, exchange_name, graph.paths[cycle], graph.legs_for(cycle), start_amount)
+            if end_amount is None:
+                return
+            latency, slippage_factor = 0, 0
+
+        gross_amount = start_amount * np.exp(log_return - graph.cycle_fees[cycle])
+        fees = float(gross_amount - start_amount * np.exp(log_return))
+        net_profit = end_amount - start_amount
+        with PROFIT_TRACKER_LOCK:
+            log_trade(f"Triangular {graph.describe(cycle)}", [start_amount, end_amount], start_amount, net_profit, net_profit + fees, fees, latency, slippage_factor, strategy="Triangular")
+        self.log(f"{get_timestamp()} - {exchange_name} - Triangular Arbitrage Executed{' (Dry Run)' if CONFIG['DRY_RUN'] else ''}: "
+                 f"{start_amount:.4f} {start_currency} -> {end_amount:.4f} {start_currency}, Fees: {fees:.4f}")
+        if PROFIT_TRACKER['total_profit'] < -CONFIG['CIRCUIT_BREAKER_THRESHOLD'] * CONFIG['SIMULATED_BALANCE']:
+            self.pause_trading()
+
+    async def execute_cycle(self, exchange, exchange_name, path, legs, start_amount):
+        # Walk the cycle with market orders, carrying each leg's fill (net of its taker fee) into the next.
+        # If a leg fails after earlier ones filled, those are reversed so no intermediate currency is left held.
+        held = start_amount
+        for k, (symbol, side, price, fee) in enumerate(legs):
+            try:
+                held = await self.cycle_order(exchange, exchange_name, symbol, side, price, fee, held)
+            except Exception as e:
+                self.account_cache.invalidate_balance(exchange_name)
+                self.log(f"{get_timestamp()} - {exchange_name} - Triangular Arbitrage Failed: {side} {symbol} - {str(e)}")
+                if k:
+                    await self.unwind_cycle(exchange, exchange_name, path, legs[:k], held, start_amount)
+                return None
+        self.account_cache.invalidate_balance(exchange_name)
+        return held
+
+    async def cycle_order(self, exchange, exchange_name, symbol, side, price, fee, held):
+        # One market order spending `held`; returns the amount received, net of the taker fee
+        if side == "BUY":
+            order = await self.exchange_call(exchange, exchange_name, 'create_market_buy_order', symbol, held / price)
+            received = order.get('filled') or held / price
+        else:
+            order = await self.exchange_call(exchange, exchange_name, 'create_market_sell_order', symbol, held)
+            received = order.get('cost') or held * price
+        return received * (1 - fee)
+
+    async def unwind_cycle(self, exchange, exchange_name, path, done, held, start_amount):
+        # Reverse the filled legs, newest first (leg j converted path[j] -> path[j + 1]), and book the result
+        j = len(done)
+        try:
+            while j:
+                symbol, side, price, fee = done[j - 1]
+                held = await self.cycle_order(exchange, exchange_name, symbol, "SELL" if side == "BUY" else "BUY", price, fee, held)
+                j -= 1
+        except Exception as e:
+            self.log(f"{get_timestamp()} - {exchange_name} - Triangular Unwind Failed: {symbol} - {str(e)}; "
+                     f"left holding {held:.8f} {path[j]} - check the exchange")
             return
-        # Existing implementation (unchanged)
-        pass
\ No newline at end of file
+        finally:
+            self.account_cache.invalidate_balance(exchange_name)
+        net_profit = held - start_amount
+        route = " -> ".join(path[:len(done) + 1] + path[:len(done)][::-1])
+        with PROFIT_TRACKER_LOCK:
+            log_trade(f"Triangular Unwind {route}", [start_amount, held], start_amount, net_profit, net_profit, 0, 0, 0, strategy="Triangular")
+        self.log(f"{get_timestamp()} - {exchange_name} - Triangular Unwind: {route}, {start_amount:.4f} -> {held:.4f} {path[0]}")
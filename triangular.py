@@ -0,0 +1,88 @@
+import numpy as np
+from config import CONFIG
+
+class CycleGraph:
+    # Currency graph over an exchange's spot markets with every 3-cycle precomputed as
+    # (market index, side) legs, so a tick is scored by one gather over the bid/ask arrays.
+    # A leg converting base -> quote sells at the bid; quote -> base buys at the ask.
+    def __init__(self, markets, start_currencies=None, default_fee=0.001):
+        symbols = sorted(symbol for symbol, market in markets.items()
+                         if market.get('spot', True) and market.get('active') is not False
+                         and market.get('base') and market.get('quote'))
+        self.symbols = symbols
+        self.index = {symbol: i for i, symbol in enumerate(symbols)}
+        self.markets = [markets[symbol] for symbol in symbols]
+        self.bids = np.full(len(symbols), np.nan)
+        self.asks = np.full(len(symbols), np.nan)
+        self.fee_logs = np.log1p(-np.array([market.get('taker') or default_fee for market in self.markets], dtype=np.float64))
+
+        edges = {}
+        neighbors = {}
+        for i, market in enumerate(self.markets):
+            base, quote = market['base'], market['quote']
+            edges[(base, quote)] = (i, True)
+            edges[(quote, base)] = (i, False)
+            neighbors.setdefault(base, set()).add(quote)
+            neighbors.setdefault(quote, set()).add(base)
+
+        starts = set(start_currencies) if start_currencies else None
+        cycles = []
+        for a in sorted(neighbors):
+            for b in sorted(neighbors[a]):
+                if b <= a:
+                    continue
+                for c in sorted(neighbors[a] & neighbors[b]):
+                    if c <= b:
+                        continue
+                    triangle = (a, b, c)
+                    if starts and not starts.intersection(triangle):
+                        continue
+                    # Rotate so the cycle starts (and ends) in a currency we hold, then take both directions
+                    first = next((x for x in triangle if starts and x in starts), a)
+                    k = triangle.index(first)
+                    rotated = triangle[k:] + triangle[:k]
+                    for path in (rotated, (rotated[0], rotated[2], rotated[1])):
+                        cycles.append((path, [edges[(path[j], path[(j + 1) % 3])] for j in range(3)]))
+
+        self.paths = [path for path, _ in cycles]
+        self.legs = np.array([[market for market, _ in legs] for _, legs in cycles], dtype=np.int64).reshape(-1, 3)
+        self.sides = np.array([[sell for _, sell in legs] for _, legs in cycles], dtype=bool).reshape(-1, 3)
+        self.symbols_in_cycles = sorted({symbols[i] for i in np.unique(self.legs)})
+        self.cycle_fees = self.fee_logs[self.legs].sum(axis=1)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def update(self, tickers):
+        for symbol, ticker in tickers.items():
+            i = self.index.get(symbol)
+            if i is not None:
+                self.bids[i] = ticker.get('bid') or np.nan
+                self.asks[i] = ticker.get('ask') or np.nan
+
+    def evaluate(self):
+        # Log return of every cycle net of taker fees; -inf where a leg has no quote
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_bids = np.log(self.bids)
+            log_asks = np.log(self.asks)
+            rates = np.where(self.sides, log_bids[self.legs], -log_asks[self.legs]).sum(axis=1) + self.cycle_fees
+        return np.where(np.isfinite(rates), rates, -np.inf)
+
+    def best(self, threshold=None):
+        # (cycle index, log return) of the most profitable cycle above threshold, or None
+        if not len(self):
+            return None
+        threshold = CONFIG['TRIANGULAR_THRESHOLD'] if threshold is None else threshold
+        returns = self.evaluate()
+        i = int(np.argmax(returns))
+        if returns[i] <= np.log1p(threshold):
+            return None
+        return i, float(returns[i])
+
+    def describe(self, i):
+        return " -> ".join(self.paths[i] + (self.paths[i][0],))
+
+    def legs_for(self, i):
+        # [(symbol, side, price, taker fee)] for the orders that walk cycle i
+        return [(self.symbols[m], "SELL" if sell else "BUY", self.bids[m] if sell else self.asks[m], float(-np.expm1(self.fee_logs[m])))
+                for m, sell in zip(self.legs[i], self.sides[i])]
@@ -1,19 +1,28 @@
 import logging
 from datetime import datetime
 import os
-import pandas as pd
-from config import PROFIT_TRACKER, TRADE_MEMORY
+import csv
+import threading
+from config import CONFIG, PROFIT_TRACKER
+from profit_stats import PROFIT_STATS
+from trade_store import TRADE_STORE
+from journal import JOURNAL
+from metrics import TimedLock
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
+PROFIT_TRACKER_LOCK = TimedLock('profit_tracker')  # held around log_trade and the report swap
 
 def get_timestamp():
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-def log_trade(signal, prices, amount, net_profit, gross_profit, fees, latency, slippage):
-    PROFIT_TRACKER['trades'].append({
+def log_trade(signal, prices, amount, net_profit, gross_profit, fees, latency, slippage, pair=None, strategy=None):
+    # The single place a closed trade is counted: report rows, PROFIT_TRACKER totals and running stats
+    trade = {
         'time': datetime.now().isoformat(),
         'signal': signal,
+        'pair': pair,
+        'strategy': strategy,
         'buy_price': prices[0],
         'sell_price': prices[1] if len(prices) > 1 else prices[0],
         'amount': amount,
@@ -22,42 +31,54 @@ def log_trade(signal, prices, amount, net_profit, gross_profit, fees, latency, s
         'net_profit': net_profit,
         'latency': latency,
         'slippage': slippage
-    })
+    }
+    PROFIT_TRACKER['trades'].append(trade)
     PROFIT_TRACKER['total_profit'] += net_profit
     PROFIT_TRACKER['trade_count'] += 1
     PROFIT_TRACKER['last_trade_time'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    PROFIT_STATS.record(net_profit, pair, strategy)
+    JOURNAL.record('trade', trade=trade, last_trade_time=PROFIT_TRACKER['last_trade_time'])
 
-def log_to_memory(pair, exchange, entry_price, exit_price, profit, sma_fast, sma_slow):
-    new_trade = pd.DataFrame({
-        "timestamp": [datetime.now().isoformat()],
-        "pair": [pair],
-        "exchange": [exchange],
-        "entry_price": [entry_price],
-        "exit_price": [exit_price],
-        "profit": [profit],
-        "sma_fast": [sma_fast],
-        "sma_slow": [sma_slow]
-    })
-    global TRADE_MEMORY
-    TRADE_MEMORY = pd.concat([TRADE_MEMORY, new_trade], ignore_index=True)
-    TRADE_MEMORY.to_csv("trade_memory.csv", index=False)
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
 
-def write_profit_report():
+def save_profit_report(report_file, trades, stats, total_profit, trade_count):
+    write_csv(report_file, trades)
+    write_csv(report_file.replace('.csv', '_summary.csv'), [{
+        'Win Rate': stats['period']['win_rate'],
+        'Avg Profit': stats['period']['mean'],
+        'Profit Std': stats['period']['std'],
+        'Total Profit': total_profit,
+        'Trade Count': trade_count,
+        'Max Drawdown': stats['overall']['max_drawdown'],
+    }])
+    breakdown = [dict(group=group, name=name, **summary)
+                 for group, key in (('pair', 'pairs'), ('strategy', 'strategies')) for name, summary in stats[key].items()]
+    if breakdown:
+        write_csv(report_file.replace('.csv', '_breakdown.csv'), breakdown)
+    if CONFIG['TRADE_STORE']:
+        TRADE_STORE.append(trades, source=os.path.basename(report_file))
+    logger.info(f"Hourly report saved: {report_file}")
+
+def write_profit_report(background=False):
+    # Taking the pending trades and the stats is O(1); with background=True the files are
+    # written on a separate thread so the trading loop never waits on disk
+    if not PROFIT_TRACKER['trades']:
+        return
+    with PROFIT_TRACKER_LOCK:
+        trades, PROFIT_TRACKER['trades'] = PROFIT_TRACKER['trades'], []
+        stats = PROFIT_STATS.close_period()
+        JOURNAL.record('report', count=len(trades))
+        total_profit, trade_count = PROFIT_TRACKER['total_profit'], PROFIT_TRACKER['trade_count']
     OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
     HOURLY_REPORT_DIR = os.path.join(OUTPUT_DIR, "hourly_report")
     os.makedirs(HOURLY_REPORT_DIR, exist_ok=True)
     REPORT_FILE = os.path.join(HOURLY_REPORT_DIR, f"hourly_report_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.csv")
-    if PROFIT_TRACKER['trades']:
-        df = pd.DataFrame(PROFIT_TRACKER['trades'])
-        df.to_csv(REPORT_FILE, index=False)
-        win_rate = len(df[df['net_profit'] > 0]) / len(df)
-        avg_profit = df['net_profit'].mean()
-        df_summary = pd.DataFrame({
-            'Win Rate': [win_rate],
-            'Avg Profit': [avg_profit],
-            'Total Profit': [PROFIT_TRACKER['total_profit']],
-            'Trade Count': [PROFIT_TRACKER['trade_count']]
-        })
-        df_summary.to_csv(REPORT_FILE.replace('.csv', '_summary.csv'), index=False)
-        PROFIT_TRACKER['trades'] = []
-        logger.info(f"Hourly report saved: {REPORT_FILE}")
\ No newline at end of file
+    args = (REPORT_FILE, trades, stats, total_profit, trade_count)
+    if background:
+        threading.Thread(target=save_profit_report, args=args).start()  # not a daemon: finishes before exit
+    else:
+        save_profit_report(*args)